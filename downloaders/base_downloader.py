@@ -11,10 +11,13 @@ from utils.file_manager import FileManager
 
 class BaseDownloader(ABC):
     """Abstract base class for all downloaders."""
+
+    # Optional shared BufferPool, attached by BulkDownloader for bulk jobs
+    buffer_pool = None
     
     def __init__(self, config_manager):
         self.config_manager = config_manager
-        self.config = config_manager.get_config()
+        self.config = config_manager.config
         self.file_manager = FileManager(config_manager)
         
     @abstractmethod
@@ -91,6 +94,25 @@ class BaseDownloader(ABC):
             logging.error(f"Error calculating file hash: {e}")
             return ""
             
+    def iter_response_chunks(self, response):
+        """Yield the body of a streamed response in chunks.
+
+        When a buffer pool is attached, chunks are read into a borrowed buffer and
+        yielded as memoryview slices that are only valid until the next iteration.
+        """
+        if self.buffer_pool is None:
+            yield from response.iter_content(chunk_size=8192)
+            return
+
+        response.raw.decode_content = True
+        with self.buffer_pool.acquire() as buf:
+            view = memoryview(buf)
+            while True:
+                n = response.raw.readinto(view)
+                if not n:
+                    break
+                yield view[:n]
+            
     def log_download_start(self, platform: str, url: str):
         """Log the start of a download."""
         logging.info(f"Starting {platform} download: {url}")
@@ -441,7 +441,7 @@ class CoomerDownloader(BaseDownloader):
             response.raise_for_status()
 
             with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
+                for chunk in self.iter_response_chunks(response):
                     if chunk:
                         f.write(chunk)
 
@@ -401,7 +401,7 @@ class GenericDownloader(BaseDownloader):
             downloaded_size = 0
             
             with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
+                for chunk in self.iter_response_chunks(response):
                     if chunk:
                         f.write(chunk)
                         downloaded_size += len(chunk)
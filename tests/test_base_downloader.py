@@ -0,0 +1,79 @@
+"""
+Tests for BaseDownloader's streamed response helpers.
+"""
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downloaders.base_downloader import BaseDownloader
+from utils.bulk_downloader import BufferPool
+
+
+class _FakeConfigManager:
+    config = {}
+
+
+class _FakeResponse:
+    """Streamed response stand-in exposing iter_content and a raw stream."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.raw = io.BytesIO(body)
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+class _ShortReadRaw:
+    """Raw stream stand-in whose readinto fills at most a few bytes per call."""
+
+    def __init__(self, body: bytes, max_read: int):
+        self.body = body
+        self.max_read = max_read
+        self.pos = 0
+        self.decode_content = False
+
+    def readinto(self, view):
+        n = min(len(view), self.max_read, len(self.body) - self.pos)
+        view[:n] = self.body[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+
+class _Downloader(BaseDownloader):
+    def download(self, url, options, progress_callback=None):
+        return {'success': True}
+
+
+def test_iter_response_chunks_without_buffer_pool():
+    downloader = _Downloader(_FakeConfigManager())
+    assert downloader.buffer_pool is None
+
+    body = os.urandom(20000)
+    chunks = list(downloader.iter_response_chunks(_FakeResponse(body)))
+
+    assert b''.join(chunks) == body
+    assert len(chunks) > 1
+
+
+def test_iter_response_chunks_with_buffer_pool():
+    downloader = _Downloader(_FakeConfigManager())
+    downloader.buffer_pool = BufferPool(size=4096, count=1)
+    pooled = downloader.buffer_pool._q.queue[0]
+
+    body = os.urandom(20000)
+    response = _FakeResponse(body)
+    response.raw = _ShortReadRaw(body, max_read=1000)
+
+    # Chunks are views into the shared buffer, so copy each before the next read
+    chunks = [bytes(chunk) for chunk in downloader.iter_response_chunks(response)]
+
+    assert b''.join(chunks) == body
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert response.raw.decode_content is True
+    assert downloader.buffer_pool._q.qsize() == 1
+    assert downloader.buffer_pool._q.queue[0] is pooled
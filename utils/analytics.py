@@ -17,7 +17,7 @@ class AnalyticsManager:
     
     def __init__(self, config_manager):
         self.config_manager = config_manager
-        self.config = config_manager.get_config()
+        self.config = config_manager.config
         self.analytics_enabled = self.config.get('analytics_enabled', True)
         self.session_id = self._generate_session_id()
         self.analytics_data = []
@@ -22,7 +22,7 @@ class AuthManager:
     
     def __init__(self, config_manager):
         self.config_manager = config_manager
-        self.config = config_manager.get_config()
+        self.config = config_manager.config
         self.auth_dir = os.path.expanduser("~/.social_media_downloader/auth")
         os.makedirs(self.auth_dir, exist_ok=True)
         
@@ -2,133 +2,310 @@
 Specialized bulk downloader for massive download operations.
 """
 
+import importlib
 import logging
+import os
+import queue
+import re
 import time
 import threading
-from typing import Dict, Any, List, Callable, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from queue import Queue, Empty
-
-class BulkDownloader:
-    """Handles massive bulk download operations with optimization."""
-
-    def __init__(self, config_manager):
-        self.config_manager = config_manager
-        self.config = config_manager.get_config()
-        self.download_queue = Queue()
-        self.active_downloads = {}
-        self.statistics = {
-            'total_requested': 0,
-            'total_completed': 0,
-            'total_failed': 0,
-            'bytes_downloaded': 0
-        }
-
-    def bulk_download_subreddit(self, subreddit: str, options: Dict[str, Any], 
-                               progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
-        """Download entire subreddit with unlimited posts."""
+from collections import ChainMap, defaultdict, namedtuple
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Any, List, Callable, Mapping, NamedTuple, Optional
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# Downloader classes keyed by platform, as "module.path.ClassName"
+_DOWNLOADER_MAP = {
+    'youtube': 'downloaders.youtube_downloader.YouTubeDownloader',
+    'tiktok': 'downloaders.tiktok_downloader.TikTokDownloader',
+    'instagram': 'downloaders.instagram_downloader.InstagramDownloader',
+    'reddit': 'downloaders.reddit_downloader.RedditDownloader',
+    'twitter': 'downloaders.twitter_downloader.TwitterDownloader',
+    'redgifs': 'downloaders.redgifs_downloader.RedgifsDownloader',
+    'xvideos': 'downloaders.xvideos_downloader.XVideosDownloader',
+    'pornhub': 'downloaders.pornhub_downloader.PornhubDownloader',
+    'coomer': 'downloaders.coomer_downloader.CoomerDownloader',
+    'kemono': 'downloaders.kemono_downloader.KemonoDownloader'
+}
+
+# Resolved downloader classes, populated lazily on first use
+_DOWNLOADER_CLASS_CACHE: Dict[str, type] = {}
+
+def _get_downloader_class(class_path: str) -> type:
+    """Resolve a downloader class from its dotted path, importing it only once."""
+    cls = _DOWNLOADER_CLASS_CACHE.get(class_path)
+    if cls:
+        return cls
+
+    module_path, class_name = class_path.rsplit('.', 1)
+    module = importlib.import_module(module_path)
+    cls = getattr(module, class_name)
+    _DOWNLOADER_CLASS_CACHE[class_path] = cls
+    return cls
+
+class _BulkSpec(NamedTuple):
+    """How a bulk_download_* method drives its downloader."""
+    class_path: str
+    method_name: str
+    option_overrides: Dict[str, Any]
+    url_template: Optional[str] = None
+    default_service: Optional[str] = None
+
+_BULK_SPECS = {
+    'reddit': _BulkSpec('downloaders.reddit_downloader.RedditDownloader', 'download',
+                        {'limit': 0}),
+    'youtube_channel': _BulkSpec('downloaders.youtube_downloader.YouTubeDownloader', 'download',
+                                 {'entire_channel': True, 'playlist_items': None}),
+    'tiktok_user': _BulkSpec('downloaders.tiktok_downloader.TikTokDownloader', 'download_user_content',
+                             {'limit': 0}),
+    'instagram_user': _BulkSpec('downloaders.instagram_downloader.InstagramDownloader', '_download_user_content',
+                                {'limit': 0}),
+    'pornhub_user': _BulkSpec('downloaders.pornhub_downloader.PornhubDownloader', '_download_user_content',
+                              {'limit': 0, 'include_gifs': True}),
+    'coomer_user': _BulkSpec('downloaders.coomer_downloader.CoomerDownloader', '_download_user_content',
+                             {'limit': 0}, 'https://coomer.su/{service}/user/{username}', 'onlyfans'),
+    'kemono_user': _BulkSpec('downloaders.kemono_downloader.KemonoDownloader', '_download_user_content',
+                             {'limit': 0}, 'https://kemono.su/{service}/user/{username}', 'patreon'),
+    'adult_site_profile': _BulkSpec('downloaders.adult_sites_downloader.AdultSitesDownloader', 'download',
+                                    {'max_pages': 0}),
+    'erome_profile': _BulkSpec('downloaders.erome_downloader.EromeDownloader', 'download',
+                               {'max_pages': 0}),
+    'kwai_profile': _BulkSpec('downloaders.kwai_downloader.KwaiDownloader', 'download',
+                              {'limit': 0}),
+    'hentai_gallery': _BulkSpec('downloaders.adult_sites_downloader.AdultSitesDownloader', 'download',
+                                {'download_all_pages': True})
+}
+
+# Single-pass platform detection for mixed URL batches
+_PLATFORM_PATTERN = re.compile(
+    r'(erome\.com|kwai\.com|pornhub\.com|coomer\.su|kemono\.su|youtube\.com|youtu\.be|'
+    r'tiktok\.com|instagram\.com|reddit\.com|redgifs\.com|twitter\.com|x\.com)',
+    re.IGNORECASE
+)
+
+_PLATFORM_MAP = {
+    'erome.com': 'erome',
+    'kwai.com': 'kwai',
+    'pornhub.com': 'pornhub',
+    'coomer.su': 'coomer',
+    'kemono.su': 'kemono',
+    'youtube.com': 'youtube',
+    'youtu.be': 'youtube',
+    'tiktok.com': 'tiktok',
+    'instagram.com': 'instagram',
+    'reddit.com': 'reddit',
+    'redgifs.com': 'redgifs',
+    'twitter.com': 'twitter',
+    'x.com': 'twitter'
+}
+
+# Point-in-time snapshot returned by BulkDownloader.get_statistics()
+BulkStatistics = namedtuple('BulkStatistics',
+                            ['total_requested', 'total_completed', 'total_failed', 'bytes_downloaded'])
+
+class _ProgressReporter:
+    """Coalesces progress callbacks to integer-percent changes, at most one per interval."""
+
+    def __init__(self, callback: Optional[Callable[[int], None]], total: int, min_interval: float = 0.1):
+        self.callback = callback
+        self.total = total
+        self.min_interval = min_interval
+        self.last_progress_reported = -1
+        self.last_progress_time = 0.0
+
+    def update(self, done: int):
+        """Report progress for done items if it changed and the interval has elapsed."""
+        if not self.callback or not self.total:
+            return
+
+        progress = (done * 100) // self.total
+        if progress == self.last_progress_reported:
+            return
+
+        now = time.monotonic()
+        # Completion is always reported so callers see the final 100%
+        if progress < 100 and now - self.last_progress_time < self.min_interval:
+            return
+
+        self.last_progress_reported = progress
+        self.last_progress_time = now
+        self.callback(progress)
+
+class BufferPool:
+    """Pool of reusable bytearray chunk buffers shared by download workers."""
+
+    def __init__(self, size: int, count: int):
+        self.size = size
+        self.count = count
+        self._q = queue.LifoQueue()
+        for _ in range(count):
+            self._q.put(bytearray(size))
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a buffer for the duration of the block."""
         try:
-            from downloaders.reddit_downloader import RedditDownloader
+            buf = self._q.get_nowait()
+        except queue.Empty:
+            # Pool exhausted, fall back to a fresh buffer rather than blocking
+            buf = bytearray(self.size)
+        try:
+            yield buf
+        finally:
+            self.release(buf)
 
-            # Override limit to 0 for unlimited
-            bulk_options = options.copy()
-            bulk_options['limit'] = 0  # Unlimited posts
+    def release(self, buf: bytearray):
+        """Return a buffer to the pool, dropping it if the pool is already full."""
+        if self._q.qsize() < self.count:
+            self._q.put(buf)
 
-            downloader = RedditDownloader(self.config_manager)
-            result = downloader.download(subreddit, bulk_options, progress_callback)
+class TokenBucket:
+    """Thread-safe token bucket that paces request dispatch for one platform."""
 
-            self.statistics['total_requested'] += 1
-            if result.get('success', False):
-                self.statistics['total_completed'] += 1
-                self.statistics['bytes_downloaded'] += result.get('files_downloaded', 0) * 1024 * 1024  # Estimate
-            else:
-                self.statistics['total_failed'] += 1
+    def __init__(self, rate_per_sec: float, burst: int = 1):
+        self.rate = rate_per_sec
+        self.capacity = float(burst)
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
 
-            return result
+    def acquire(self):
+        """Take one token, blocking only while the bucket is empty."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
 
-        except Exception as e:
-            logging.error(f"Bulk subreddit download failed: {e}")
-            self.statistics['total_failed'] += 1
-            return {'success': False, 'error': str(e)}
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
 
-    def bulk_download_youtube_channel(self, channel_url: str, options: Dict[str, Any], 
-                                     progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
-        """Download entire YouTube channel."""
-        try:
-            from downloaders.youtube_downloader import YouTubeDownloader
+                wait_time = (1.0 - self._tokens) / self.rate
 
-            # Set options for entire channel
-            bulk_options = options.copy()
-            bulk_options['entire_channel'] = True
-            bulk_options['playlist_items'] = None  # Download all
+            time.sleep(wait_time)
+
+class BulkDownloader:
+    """Handles massive bulk download operations with optimization."""
 
-            downloader = YouTubeDownloader(self.config_manager)
-            result = downloader.download(channel_url, bulk_options, progress_callback)
+    __slots__ = ('config_manager', 'config', '_stats_lock', '_total_requested', '_total_completed',
+                 '_total_failed', '_bytes_downloaded', '_rate_limiters', '_cpu_pool', '_tls',
+                 '_downloaders', 'buffer_pool')
 
-            self.statistics['total_requested'] += 1
-            if result.get('success', False):
-                self.statistics['total_completed'] += 1
-            else:
-                self.statistics['total_failed'] += 1
+    def __init__(self, config_manager):
+        self.config_manager = config_manager
+        self.config = config_manager.config
+        self._stats_lock = threading.Lock()
+        self._total_requested = 0
+        self._total_completed = 0
+        self._total_failed = 0
+        self._bytes_downloaded = 0
+        self._rate_limiters = {}
+        self._cpu_pool = None
+        self._tls = threading.local()
+        self._downloaders = {}
+
+        # Chunk buffers lent to downloaders for streamed file writes
+        max_workers = self.config.get('max_concurrent_downloads', 5)
+        self.buffer_pool = BufferPool(1 << 20, max_workers * 2)
+
+    def _get_downloader(self, class_path: str):
+        """Get the downloader for a class path, reusing it (and its HTTP session) across bulk calls."""
+        downloader = self._downloaders.get(class_path)
+        if downloader is None:
+            downloader = _get_downloader_class(class_path)(self.config_manager)
+            self._downloaders[class_path] = downloader
+        return downloader
+
+    def _get_thread_downloader(self, platform: str, downloader_class: type):
+        """Get the calling worker thread's downloader for a platform, creating it once per thread."""
+        attr = 'dl_' + platform
+        downloader = getattr(self._tls, attr, None)
+        if downloader is None:
+            downloader = downloader_class(self.config_manager)
+            downloader.buffer_pool = self.buffer_pool
+            setattr(self._tls, attr, downloader)
+        return downloader
+
+    def _get_cpu_pool(self) -> ProcessPoolExecutor:
+        """Lazily create the process pool used for CPU-bound post-processing."""
+        if self._cpu_pool is None:
+            self._cpu_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return self._cpu_pool
+
+    def close(self):
+        """Shut down the post-processing worker processes."""
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=True)
+            self._cpu_pool = None
+
+    def _bump(self, field: str, n: int = 1):
+        """Atomically add n to a statistics counter."""
+        attr = '_' + field
+        with self._stats_lock:
+            setattr(self, attr, getattr(self, attr) + n)
+
+    def _get_rate_limiter(self, platform: str, options: Dict[str, Any]) -> Optional[TokenBucket]:
+        """Get the shared rate limiter for a platform, or None when no delay is configured."""
+        delay = options.get('delay', 5)
+        if delay <= 0:
+            return None
+
+        limiter = self._rate_limiters.get(platform)
+        if limiter is None:
+            limiter = self._rate_limiters.setdefault(platform, TokenBucket(1.0 / delay))
+        return limiter
 
-            return result
+    def bulk_download_subreddit(self, subreddit: str, options: Dict[str, Any], 
+                                progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """Download entire subreddit with unlimited posts."""
+        return self._bulk('reddit', subreddit, options, progress_callback)
 
-        except Exception as e:
-            logging.error(f"Bulk YouTube channel download failed: {e}")
-            self.statistics['total_failed'] += 1
-            return {'success': False, 'error': str(e)}
+    def bulk_download_youtube_channel(self, channel_url: str, options: Dict[str, Any], 
+                                      progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """Download entire YouTube channel."""
+        return self._bulk('youtube_channel', channel_url, options, progress_callback)
 
     def bulk_download_tiktok_user(self, username: str, options: Dict[str, Any], 
-                                 progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+                                  progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
         """Download all content from TikTok user."""
-        try:
-            from downloaders.tiktok_downloader import TikTokDownloader
-
-            # Override limit for unlimited
-            bulk_options = options.copy()
-            bulk_options['limit'] = 0  # Unlimited videos
-
-            downloader = TikTokDownloader(self.config_manager)
-            result = downloader.download_user_content(username, bulk_options, progress_callback)
-
-            self.statistics['total_requested'] += 1
-            if result.get('success', False):
-                self.statistics['total_completed'] += 1
-            else:
-                self.statistics['total_failed'] += 1
-
-            return result
-
-        except Exception as e:
-            logging.error(f"Bulk TikTok user download failed: {e}")
-            self.statistics['total_failed'] += 1
-            return {'success': False, 'error': str(e)}
+        return self._bulk('tiktok_user', username, options, progress_callback)
 
     def bulk_download_instagram_user(self, username: str, options: Dict[str, Any], 
-                                    progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+                                     progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
         """Download all content from Instagram user."""
+        return self._bulk('instagram_user', username, ChainMap(options, {'include_stories': False}), progress_callback)
+
+    def _bulk(self, spec_key: str, target: str, options: Mapping[str, Any],
+              progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """Run a bulk download described by an entry in _BULK_SPECS."""
+        spec = _BULK_SPECS[spec_key]
         try:
-            from downloaders.instagram_downloader import InstagramDownloader
+            # Lazy view over the caller's options; the leading empty map absorbs any
+            # writes so neither the caller's dict nor the shared spec is mutated
+            bulk_options = ChainMap({}, spec.option_overrides, options)
 
-            # Override limit for unlimited
-            bulk_options = options.copy()
-            bulk_options['limit'] = 0  # Unlimited posts
-            bulk_options['include_stories'] = options.get('include_stories', False)
+            # Construct proper URL if just username provided
+            if spec.url_template and not target.startswith('http'):
+                service = options.get('service', spec.default_service)
+                target = spec.url_template.format(service=service, username=target)
 
-            downloader = InstagramDownloader(self.config_manager)
-            result = downloader._download_user_content(username, bulk_options, progress_callback)
+            downloader = self._get_downloader(spec.class_path)
+            result = getattr(downloader, spec.method_name)(target, bulk_options, progress_callback)
 
-            self.statistics['total_requested'] += 1
             if result.get('success', False):
-                self.statistics['total_completed'] += 1
+                self._flush_statistics(1, 1, 0, result.get('files_downloaded', 0) << 20)  # Estimate
             else:
-                self.statistics['total_failed'] += 1
+                self._flush_statistics(1, 0, 1)
 
             return result
 
         except Exception as e:
-            logging.error(f"Bulk Instagram user download failed: {e}")
-            self.statistics['total_failed'] += 1
+            logger.error("Bulk %s download failed: %s", spec_key, e)
+            self._bump('total_failed')
             return {'success': False, 'error': str(e)}
 
     def crawl_and_download_platform(self, platform: str, crawl_options: Dict[str, Any], 
@@ -152,7 +329,7 @@ class BulkDownloader:
                 return {'success': False, 'error': f'Unsupported crawl type: {crawl_type}'}
 
         except Exception as e:
-            logging.error(f"Platform crawling failed: {e}")
+            logger.error("Platform crawling failed: %s", e)
             return {'success': False, 'error': str(e)}
 
     def _crawl_user_content(self, platform: str, username: str, options: Dict[str, Any], 
@@ -184,7 +361,7 @@ class BulkDownloader:
         """Crawl content by hashtag."""
         try:
             # This would require hashtag-specific API implementations
-            logging.warning(f"Hashtag crawling for {platform} requires specialized API integration")
+            logger.warning("Hashtag crawling for %s requires specialized API integration", platform)
             return {'success': False, 'error': 'Hashtag crawling not yet implemented'}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -194,7 +371,7 @@ class BulkDownloader:
         """Crawl search results from platform."""
         try:
             # This would require search API implementations
-            logging.warning(f"Search crawling for {platform} requires specialized API integration")
+            logger.warning("Search crawling for %s requires specialized API integration", platform)
             return {'success': False, 'error': 'Search crawling not yet implemented'}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -204,7 +381,7 @@ class BulkDownloader:
         """Crawl trending content from platform."""
         try:
             # This would require trending/discover API implementations
-            logging.warning(f"Trending crawling for {platform} requires specialized API integration")
+            logger.warning("Trending crawling for %s requires specialized API integration", platform)
             return {'success': False, 'error': 'Trending crawling not yet implemented'}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -217,65 +394,76 @@ class BulkDownloader:
             total_urls = len(urls)
             completed = 0
             failed = 0
-            results = []
-
-            # Import appropriate downloader
-            downloader_map = {
-                'youtube': 'downloaders.youtube_downloader.YouTubeDownloader',
-                'tiktok': 'downloaders.tiktok_downloader.TikTokDownloader',
-                'instagram': 'downloaders.instagram_downloader.InstagramDownloader',
-                'reddit': 'downloaders.reddit_downloader.RedditDownloader',
-                'twitter': 'downloaders.twitter_downloader.TwitterDownloader',
-                'redgifs': 'downloaders.redgifs_downloader.RedgifsDownloader',
-                'xvideos': 'downloaders.xvideos_downloader.XVideosDownloader',
-                'pornhub': 'downloaders.pornhub_downloader.PornhubDownloader',
-                'coomer': 'downloaders.coomer_downloader.CoomerDownloader',
-                'kemono': 'downloaders.kemono_downloader.KemonoDownloader'
-            }
+            total_bytes = 0
 
-            if platform not in downloader_map:
+            if platform not in _DOWNLOADER_MAP:
                 return {'success': False, 'error': f'Unsupported platform: {platform}'}
 
-            # Dynamic import
-            module_path, class_name = downloader_map[platform].rsplit('.', 1)
-            module = __import__(module_path, fromlist=[class_name])
-            downloader_class = getattr(module, class_name)
+            downloader_class = _get_downloader_class(_DOWNLOADER_MAP[platform])
+            rate_limiter = self._get_rate_limiter(platform, options)
+
+            # Optional top-level (picklable) callable run on each successful result
+            postprocess = options.get('postprocess')
+            cpu_pool = self._get_cpu_pool() if postprocess else None
 
             def download_single_url(url):
                 try:
-                    downloader = downloader_class(self.config_manager)
-                    return downloader.download(url, options)
+                    downloader = self._get_thread_downloader(platform, downloader_class)
+                    if rate_limiter:
+                        rate_limiter.acquire()
+                    result = downloader.download(url, options)
+
+                    if cpu_pool and result.get('success', False):
+                        # CPU-bound post-processing runs in a worker process, outside the GIL
+                        result['postprocess_result'] = cpu_pool.submit(postprocess, result).result()
+
+                    return result
                 except Exception as e:
-                    logging.error(f"Failed to download {url}: {e}")
+                    logger.error("Failed to download %s: %s", url, e)
                     return {'success': False, 'error': str(e)}
 
-            # Use ThreadPoolExecutor for concurrent downloads
+            # Results are preallocated and filled in input order as futures complete
+            results = [None] * total_urls
+
+            reporter = _ProgressReporter(progress_callback, total_urls)
+
+            # Use ThreadPoolExecutor for concurrent downloads, keeping only a bounded
+            # window of futures in flight so memory stays flat for huge URL lists
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_url = {executor.submit(download_single_url, url): url for url in urls}
+                pending = iter(enumerate(urls))
+                future_to_idx = {}
 
-                for future in as_completed(future_to_url):
-                    url = future_to_url[future]
-                    try:
-                        result = future.result()
-                        results.append({'url': url, 'result': result})
+                def submit_next(count):
+                    for idx, url in islice(pending, count):
+                        future_to_idx[executor.submit(download_single_url, url)] = idx
 
-                        if result.get('success', False):
-                            completed += 1
-                        else:
-                            failed += 1
+                submit_next(max_workers * 4)
 
-                        if progress_callback:
-                            progress = int(((completed + failed) / total_urls) * 100)
-                            progress_callback(progress)
+                while future_to_idx:
+                    done, _ = wait(future_to_idx, return_when=FIRST_COMPLETED)
 
-                    except Exception as e:
-                        logging.error(f"Exception for {url}: {e}")
-                        failed += 1
-                        results.append({'url': url, 'result': {'success': False, 'error': str(e)}})
+                    for future in done:
+                        idx = future_to_idx.pop(future)
+                        url = urls[idx]
+                        try:
+                            result = future.result()
+                            results[idx] = {'url': url, 'result': result}
 
-            self.statistics['total_requested'] += total_urls
-            self.statistics['total_completed'] += completed
-            self.statistics['total_failed'] += failed
+                            if result.get('success', False):
+                                completed += 1
+                                total_bytes += result.get('files_downloaded', 0) << 20  # Estimate, 1 MiB per file
+                            else:
+                                failed += 1
+
+                        except Exception as e:
+                            logger.error("Exception for %s: %s", url, e)
+                            failed += 1
+                            results[idx] = {'url': url, 'result': {'success': False, 'error': str(e)}}
+
+                    reporter.update(completed + failed)
+                    submit_next(len(done))
+
+            self._flush_statistics(total_urls, completed, failed, total_bytes)
 
             return {
                 'success': True,
@@ -286,7 +474,7 @@ class BulkDownloader:
             }
 
         except Exception as e:
-            logging.error(f"Bulk multiple URLs download failed: {e}")
+            logger.error("Bulk multiple URLs download failed: %s", e)
             return {'success': False, 'error': str(e)}
 
     def batch_process_mixed_urls(self, urls: List[str], options: Dict[str, Any] = None,
@@ -305,58 +493,61 @@ class BulkDownloader:
                 'errors': []
             }
             
-            for i, url in enumerate(urls):
+            reporter = _ProgressReporter(progress_callback, total_urls)
+
+            # Group URLs by platform so each platform is dispatched once
+            buckets = defaultdict(list)
+            for url in urls:
+                buckets[self._detect_platform_from_url(url)].append(url)
+
+            # Profile crawlers download whole accounts, so they still run one URL at a time
+            profile_handlers = {
+                'erome': self.bulk_download_erome_profile,
+                'kwai': self.bulk_download_kwai_profile,
+                'pornhub': self.bulk_download_pornhub_user
+            }
+            max_workers = options.get('concurrency', 8)
+
+            for platform, platform_urls in buckets.items():
+                breakdown = results['platform_breakdown'].setdefault(
+                    platform, {'processed': 0, 'successful': 0, 'failed': 0})
+
                 try:
-                    # Detect platform
-                    platform = self._detect_platform_from_url(url)
-                    
-                    if platform not in results['platform_breakdown']:
-                        results['platform_breakdown'][platform] = {'processed': 0, 'successful': 0, 'failed': 0}
-                    
-                    results['platform_breakdown'][platform]['processed'] += 1
-                    
-                    # Get appropriate downloader
-                    if platform == 'erome':
-                        result = self.bulk_download_erome_profile(url, options, None)
-                    elif platform == 'kwai':
-                        result = self.bulk_download_kwai_profile(url, options, None)
-                    elif platform == 'pornhub':
-                        result = self.bulk_download_pornhub_user(url, options, None)
-                    else:
-                        # Use multiple URLs method for other platforms
-                        result = self.bulk_download_multiple_urls([url], platform, options, None, 1)
-                    
-                    if result.get('success', False):
-                        results['successful'] += 1
-                        results['platform_breakdown'][platform]['successful'] += 1
+                    handler = profile_handlers.get(platform)
+                    if handler:
+                        rate_limiter = self._get_rate_limiter(platform, options)
+                        url_results = []
+                        for url in platform_urls:
+                            if rate_limiter:
+                                rate_limiter.acquire()
+                            url_results.append((url, handler(url, options, None)))
                     else:
-                        results['failed'] += 1
-                        results['platform_breakdown'][platform]['failed'] += 1
-                        results['errors'].append({
-                            'url': url,
-                            'platform': platform,
-                            'error': result.get('error', 'Unknown error')
-                        })
-                    
-                    results['processed'] += 1
-                    
-                    # Progress callback
-                    if progress_callback:
-                        progress = int(((i + 1) / total_urls) * 100)
-                        progress_callback(progress)
-                    
-                    # Rate limiting
-                    time.sleep(options.get('delay', 5))
-                    
+                        batch = self.bulk_download_multiple_urls(platform_urls, platform, options,
+                                                                 None, max_workers)
+                        if batch.get('success', False):
+                            url_results = [(item['url'], item['result']) for item in batch['results']]
+                        else:
+                            url_results = [(url, batch) for url in platform_urls]
+
                 except Exception as e:
-                    results['failed'] += 1
-                    results['errors'].append({
-                        'url': url,
-                        'platform': 'unknown',
-                        'error': str(e)
-                    })
-                    logging.error(f"Error processing URL {url}: {e}")
-            
+                    logger.error("Error processing %s URLs: %s", platform, e)
+                    url_results = [(url, {'success': False, 'error': str(e)}) for url in platform_urls]
+
+                errors = [{'url': url, 'platform': platform, 'error': result.get('error', 'Unknown error')}
+                          for url, result in url_results if not result.get('success', False)]
+                failed = len(errors)
+                successful = len(url_results) - failed
+
+                breakdown['processed'] += len(url_results)
+                breakdown['successful'] += successful
+                breakdown['failed'] += failed
+                results['processed'] += len(url_results)
+                results['successful'] += successful
+                results['failed'] += failed
+                results['errors'].extend(errors)
+
+                reporter.update(results['processed'])
+
             return {
                 'success': True,
                 'total_urls': total_urls,
@@ -364,240 +555,69 @@ class BulkDownloader:
             }
             
         except Exception as e:
-            logging.error(f"Batch processing failed: {e}")
+            logger.error("Batch processing failed: %s", e)
             return {'success': False, 'error': str(e)}
 
     def _detect_platform_from_url(self, url: str) -> str:
         """Detect platform from URL for batch processing."""
-        url_lower = url.lower()
-        
-        if 'erome.com' in url_lower:
-            return 'erome'
-        elif 'kwai.com' in url_lower:
-            return 'kwai'
-        elif 'pornhub.com' in url_lower:
-            return 'pornhub'
-        elif 'coomer.su' in url_lower:
-            return 'coomer'
-        elif 'kemono.su' in url_lower:
-            return 'kemono'
-        elif 'youtube.com' in url_lower or 'youtu.be' in url_lower:
-            return 'youtube'
-        elif 'tiktok.com' in url_lower:
-            return 'tiktok'
-        elif 'instagram.com' in url_lower:
-            return 'instagram'
-        elif 'reddit.com' in url_lower:
-            return 'reddit'
-        elif 'redgifs.com' in url_lower:
-            return 'redgifs'
-        elif 'twitter.com' in url_lower or 'x.com' in url_lower:
-            return 'twitter'
-        else:
+        match = _PLATFORM_PATTERN.search(url)
+        if not match:
             return 'generic'
+        return _PLATFORM_MAP.get(match.group(1).lower(), 'generic')
 
     def bulk_download_pornhub_user(self, username: str, options: Dict[str, Any], 
-                                  progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+                                   progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
         """Download all content from Pornhub user including videos and GIFs."""
-        try:
-            from downloaders.pornhub_downloader import PornhubDownloader
-
-            # Override limit for unlimited
-            bulk_options = options.copy()
-            bulk_options['limit'] = 0  # Unlimited content
-            bulk_options['include_gifs'] = True
-
-            downloader = PornhubDownloader(self.config_manager)
-            result = downloader._download_user_content(username, bulk_options, progress_callback)
-
-            self.statistics['total_requested'] += 1
-            if result.get('success', False):
-                self.statistics['total_completed'] += 1
-            else:
-                self.statistics['total_failed'] += 1
-
-            return result
-
-        except Exception as e:
-            logging.error(f"Bulk Pornhub user download failed: {e}")
-            self.statistics['total_failed'] += 1
-            return {'success': False, 'error': str(e)}
+        return self._bulk('pornhub_user', username, options, progress_callback)
 
     def bulk_download_coomer_user(self, username: str, options: Dict[str, Any], 
-                                 progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+                                  progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
         """Download all content from Coomer.su user."""
-        try:
-            from downloaders.coomer_downloader import CoomerDownloader
-
-            # Override limit for unlimited
-            bulk_options = options.copy()
-            bulk_options['limit'] = 0  # Unlimited posts
-
-            # Construct proper URL if just username provided
-            if not username.startswith('http'):
-                service = options.get('service', 'onlyfans')  # Default to OnlyFans
-                username = f"https://coomer.su/{service}/user/{username}"
-
-            downloader = CoomerDownloader(self.config_manager)
-            result = downloader._download_user_content(username, bulk_options, progress_callback)
-
-            self.statistics['total_requested'] += 1
-            if result.get('success', False):
-                self.statistics['total_completed'] += 1
-            else:
-                self.statistics['total_failed'] += 1
-
-            return result
-
-        except Exception as e:
-            logging.error(f"Bulk Coomer user download failed: {e}")
-            self.statistics['total_failed'] += 1
-            return {'success': False, 'error': str(e)}
+        return self._bulk('coomer_user', username, options, progress_callback)
 
     def bulk_download_kemono_user(self, username: str, options: Dict[str, Any], 
-                                 progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+                                  progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
         """Download all content from Kemono.su user."""
-        try:
-            from downloaders.kemono_downloader import KemonoDownloader
-
-            # Override limit for unlimited
-            bulk_options = options.copy()
-            bulk_options['limit'] = 0  # Unlimited posts
-
-            # Construct proper URL if just username provided
-            if not username.startswith('http'):
-                service = options.get('service', 'patreon')  # Default to Patreon
-                username = f"https://kemono.su/{service}/user/{username}"
-
-            downloader = KemonoDownloader(self.config_manager)
-            result = downloader._download_user_content(username, bulk_options, progress_callback)
-
-            self.statistics['total_requested'] += 1
-            if result.get('success', False):
-                self.statistics['total_completed'] += 1
-            else:
-                self.statistics['total_failed'] += 1
-
-            return result
-
-        except Exception as e:
-            logging.error(f"Bulk Kemono user download failed: {e}")
-            self.statistics['total_failed'] += 1
-            return {'success': False, 'error': str(e)}
+        return self._bulk('kemono_user', username, options, progress_callback)
 
     def bulk_download_adult_site_profile(self, profile_url: str, options: Dict[str, Any], 
-                                        progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+                                         progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
         """Download all content from adult site profile (urlebird, ttthots, sotwe, fapsly, etc.)."""
-        try:
-            from downloaders.adult_sites_downloader import AdultSitesDownloader
-
-            # Override limit for unlimited posts
-            bulk_options = options.copy()
-            bulk_options['max_pages'] = 0  # Unlimited pages
-
-            downloader = AdultSitesDownloader(self.config_manager)
-            result = downloader.download(profile_url, bulk_options, progress_callback)
-
-            self.statistics['total_requested'] += 1
-            if result.get('success', False):
-                self.statistics['total_completed'] += 1
-            else:
-                self.statistics['total_failed'] += 1
-
-            return result
-
-        except Exception as e:
-            logging.error(f"Bulk adult site profile download failed: {e}")
-            self.statistics['total_failed'] += 1
-            return {'success': False, 'error': str(e)}
+        return self._bulk('adult_site_profile', profile_url, options, progress_callback)
 
     def bulk_download_erome_profile(self, profile_url: str, options: Dict[str, Any], 
-                                   progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+                                    progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
         """Download all albums from Erome profile."""
-        try:
-            from downloaders.erome_downloader import EromeDownloader
-
-            # Override for unlimited pages
-            bulk_options = options.copy()
-            bulk_options['max_pages'] = 0  # Unlimited pages
-
-            downloader = EromeDownloader(self.config_manager)
-            result = downloader.download(profile_url, bulk_options, progress_callback)
-
-            self.statistics['total_requested'] += 1
-            if result.get('success', False):
-                self.statistics['total_completed'] += 1
-            else:
-                self.statistics['total_failed'] += 1
-
-            return result
-
-        except Exception as e:
-            logging.error(f"Bulk Erome profile download failed: {e}")
-            self.statistics['total_failed'] += 1
-            return {'success': False, 'error': str(e)}
+        return self._bulk('erome_profile', profile_url, options, progress_callback)
 
     def bulk_download_kwai_profile(self, profile_url: str, options: Dict[str, Any], 
-                                  progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+                                   progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
         """Download all videos from Kwai profile."""
-        try:
-            from downloaders.kwai_downloader import KwaiDownloader
-
-            # Override for unlimited videos
-            bulk_options = options.copy()
-            bulk_options['limit'] = 0  # Unlimited videos
-
-            downloader = KwaiDownloader(self.config_manager)
-            result = downloader.download(profile_url, bulk_options, progress_callback)
-
-            self.statistics['total_requested'] += 1
-            if result.get('success', False):
-                self.statistics['total_completed'] += 1
-            else:
-                self.statistics['total_failed'] += 1
-
-            return result
-
-        except Exception as e:
-            logging.error(f"Bulk Kwai profile download failed: {e}")
-            self.statistics['total_failed'] += 1
-            return {'success': False, 'error': str(e)}
+        return self._bulk('kwai_profile', profile_url, options, progress_callback)
 
     def bulk_download_hentai_gallery(self, gallery_url: str, options: Dict[str, Any], 
-                                    progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+                                     progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
         """Download complete hentai galleries from nhentai, imhentai, hentaiera."""
-        try:
-            from downloaders.adult_sites_downloader import AdultSitesDownloader
-
-            # Set options for complete gallery download
-            bulk_options = options.copy()
-            bulk_options['download_all_pages'] = True
-
-            downloader = AdultSitesDownloader(self.config_manager)
-            result = downloader.download(gallery_url, bulk_options, progress_callback)
-
-            self.statistics['total_requested'] += 1
-            if result.get('success', False):
-                self.statistics['total_completed'] += 1
-            else:
-                self.statistics['total_failed'] += 1
-
-            return result
-
-        except Exception as e:
-            logging.error(f"Bulk hentai gallery download failed: {e}")
-            self.statistics['total_failed'] += 1
-            return {'success': False, 'error': str(e)}
-
-    def get_statistics(self) -> Dict[str, Any]:
-        """Get bulk download statistics."""
-        return self.statistics.copy()
+        return self._bulk('hentai_gallery', gallery_url, options, progress_callback)
+
+    def _flush_statistics(self, requested: int, completed: int, failed: int, bytes_downloaded: int = 0):
+        """Add locally aggregated counts to the statistics under a single lock acquisition."""
+        with self._stats_lock:
+            self._total_requested += requested
+            self._total_completed += completed
+            self._total_failed += failed
+            self._bytes_downloaded += bytes_downloaded
+
+    def get_statistics(self) -> BulkStatistics:
+        """Get a consistent snapshot of bulk download statistics."""
+        with self._stats_lock:
+            return BulkStatistics(self._total_requested, self._total_completed,
+                                  self._total_failed, self._bytes_downloaded)
 
     def reset_statistics(self):
         """Reset download statistics."""
-        self.statistics = {
-            'total_requested': 0,
-            'total_completed': 0,
-            'total_failed': 0,
-            'bytes_downloaded': 0
-        }
\ No newline at end of file
+        with self._stats_lock:
+            self._total_requested = 0
+            self._total_completed = 0
+            self._total_failed = 0
+            self._bytes_downloaded = 0
@@ -3,38 +3,120 @@ Configuration management for the application.
 """
 
 import os
-import json
+import ast
+import copy
 import logging
-from typing import Dict, Any
+import functools
+import hashlib
+import pprint
+from typing import Dict, Any, Optional, Tuple
+
+from utils import json_backend
+
+# Memoized dotted-key splits; setting keys are short and come from a bounded set
+_split_cache: Dict[str, Tuple[str, ...]] = {}
+
+def _split_key(key: str) -> Tuple[str, ...]:
+    """Split a dotted setting key, caching the result."""
+    keys = _split_cache.get(key)
+    if keys is None:
+        keys = _split_cache.setdefault(key, tuple(key.split('.')))
+    return keys
+
+def _iter_flatten(config: Dict[str, Any], prefix: str = ''):
+    """Yield (dotted_key, value) for every key in a nested config, sections included."""
+    for key, value in config.items():
+        dotted = f"{prefix}{key}"
+        yield dotted, value
+        if isinstance(value, dict):
+            yield from _iter_flatten(value, dotted + '.')
+
+_HOME_DIR = os.path.expanduser("~")
+
+@functools.cache
+def _default_download_dir() -> str:
+    """Resolve the default download directory once per process."""
+    return os.path.join(_HOME_DIR, "Downloads", "SocialMediaDownloader")
+
+# Template for the default configuration; always hand out deep copies
+_DEFAULT_CONFIG: Dict[str, Any] = {
+    # Download settings
+    "download_directory": None,  # Resolved lazily by _default_download_dir()
+    "max_concurrent_downloads": 3,
+    "organize_by_platform": True,
+    "skip_existing_files": True,
+    
+    # File naming
+    "add_date_to_filename": False,
+    "sanitize_filenames": True,
+    
+    # Quality settings
+    "default_video_quality": "best",
+    "audio_format": "mp3",
+    
+    # Advanced settings
+    "enable_detailed_logging": True,
+    "retry_attempts": 3,
+    "request_timeout": 30,
+    
+    # Platform-specific settings
+    "youtube": {
+        "extract_audio": False,
+        "write_thumbnail": True,
+        "write_info_json": True
+    },
+    "tiktok": {
+        "process_slideshows": True,
+        "slideshow_duration_per_image": 3
+    },
+    "instagram": {
+        "include_stories": False,
+        "download_comments": False
+    },
+    "reddit": {
+        "min_score": 0,
+        "skip_nsfw": False
+    }
+}
 
 class ConfigManager:
     """Manages application configuration."""
     
     def __init__(self):
-        self.config_dir = os.path.expanduser("~/.social_media_downloader")
-        self.config_file = os.path.join(self.config_dir, "config.json")
+        self.config_dir = os.path.join(_HOME_DIR, ".social_media_downloader")
+        self.config_file = os.path.join(self.config_dir, "config.py")
+        self.legacy_config_file = os.path.join(self.config_dir, "config.json")
         self.default_config_file = os.path.join(os.path.dirname(__file__), "..", "config", "default_config.json")
         
         # Ensure config directory exists
         os.makedirs(self.config_dir, exist_ok=True)
         
+        # Digest of the last config bytes read from or written to disk
+        self._config_digest = None
+        
         # Load configuration
         self.config = self._load_config()
         
+        # Flat dotted-key view of self.config for single-lookup get_setting
+        self._rebuild_flat()
+        
+    def _rebuild_flat(self):
+        """Rebuild the flat dotted-key view after the nested config changed."""
+        self._flat: Dict[str, Any] = dict(_iter_flatten(self.config))
+        
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from file or create default."""
         try:
             # Try to load existing config
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    
+            config, is_legacy = self._read_config_file()
+            if config is not None:
                 # Merge with default config to ensure all keys exist
                 default_config = self._get_default_config()
                 merged_config = {**default_config, **config}
                 
-                # Save merged config to update any missing keys
-                self._save_config_file(merged_config)
+                # Save merged config if it added missing keys or needs migrating from JSON
+                if is_legacy or merged_config != config:
+                    self._save_config_file(merged_config)
                 
                 return merged_config
             else:
@@ -48,55 +130,65 @@ class ConfigManager:
             # Return default configuration as fallback
             return self._get_default_config()
             
+    def _read_config_file(self) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Read saved configuration, preferring the Python module over legacy JSON.
+        
+        Returns the config (or None if nothing is saved) and whether it came from
+        the legacy JSON file.
+        """
+        if os.path.exists(self.config_file):
+            with open(self.config_file, 'rb') as f:
+                config = self._parse_config(f.read())
+            self._config_digest = hashlib.blake2b(self._serialize_config(config)).digest()
+            return config, False
+            
+        if os.path.exists(self.legacy_config_file):
+            with open(self.legacy_config_file, 'rb') as f:
+                return json_backend.loads(f.read()), True
+                
+        return None, False
+        
+    @staticmethod
+    def _parse_config(data: bytes) -> Dict[str, Any]:
+        """Evaluate the literal assigned to ``config`` without executing the file."""
+        for node in ast.parse(data, mode='exec').body:
+            if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                    and isinstance(node.targets[0], ast.Name) and node.targets[0].id == 'config'):
+                config = ast.literal_eval(node.value)
+                if not isinstance(config, dict):
+                    raise ValueError("config must be a dict literal")
+                return config
+        raise ValueError("no 'config = {...}' assignment found")
+        
+    @staticmethod
+    def _serialize_config(config: Dict[str, Any]) -> bytes:
+        """Render configuration as Python source defining a ``config`` dict."""
+        return f"config = {pprint.pformat(config, sort_dicts=False)}\n".encode('utf-8')
+        
     def _get_default_config(self) -> Dict[str, Any]:
         """Get default configuration."""
-        default_download_dir = os.path.join(os.path.expanduser("~"), "Downloads", "SocialMediaDownloader")
-        
-        return {
-            # Download settings
-            "download_directory": default_download_dir,
-            "max_concurrent_downloads": 3,
-            "organize_by_platform": True,
-            "skip_existing_files": True,
-            
-            # File naming
-            "add_date_to_filename": False,
-            "sanitize_filenames": True,
-            
-            # Quality settings
-            "default_video_quality": "best",
-            "audio_format": "mp3",
-            
-            # Advanced settings
-            "enable_detailed_logging": True,
-            "retry_attempts": 3,
-            "request_timeout": 30,
-            
-            # Platform-specific settings
-            "youtube": {
-                "extract_audio": False,
-                "write_thumbnail": True,
-                "write_info_json": True
-            },
-            "tiktok": {
-                "process_slideshows": True,
-                "slideshow_duration_per_image": 3
-            },
-            "instagram": {
-                "include_stories": False,
-                "download_comments": False
-            },
-            "reddit": {
-                "min_score": 0,
-                "skip_nsfw": False
-            }
-        }
+        config = copy.deepcopy(_DEFAULT_CONFIG)
+        config["download_directory"] = _default_download_dir()
+        return config
         
     def _save_config_file(self, config: Dict[str, Any]):
         """Save configuration to file."""
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            data = self._serialize_config(config)
+            digest = hashlib.blake2b(data).digest()
+            
+            # Skip the write when the file already holds exactly these bytes
+            if digest == self._config_digest:
+                return
+                
+            # Write beside the target and rename over it so readers never see a partial file
+            tmp_file = self.config_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.config_file)
+            self._config_digest = digest
         except Exception as e:
             logging.error(f"Error saving configuration: {e}")
             
@@ -108,6 +200,7 @@ class ConfigManager:
         """Save configuration."""
         try:
             self.config = config
+            self._rebuild_flat()
             self._save_config_file(config)
             logging.info("Configuration saved successfully")
         except Exception as e:
@@ -116,36 +209,38 @@ class ConfigManager:
             
     def get_setting(self, key: str, default: Any = None) -> Any:
         """Get a specific setting."""
-        keys = key.split('.')
-        value = self.config
-        
-        try:
-            for k in keys:
-                value = value[k]
-            return value
-        except (KeyError, TypeError):
-            return default
+        return self._flat.get(key, default)
             
     def set_setting(self, key: str, value: Any):
         """Set a specific setting."""
-        keys = key.split('.')
+        keys = _split_key(key)
         config = self.config
+        reshaped = False
         
         # Navigate to the parent of the target key
         for k in keys[:-1]:
             if k not in config:
                 config[k] = {}
+                reshaped = True
             config = config[k]
             
         # Set the value
+        old_value = config.get(keys[-1])
         config[keys[-1]] = value
         
+        # Sections appearing or disappearing change the set of dotted keys
+        if reshaped or isinstance(value, dict) or isinstance(old_value, dict):
+            self._rebuild_flat()
+        else:
+            self._flat[key] = value
+        
         # Save configuration
         self._save_config_file(self.config)
         
     def reset_to_defaults(self):
         """Reset configuration to defaults."""
         self.config = self._get_default_config()
+        self._rebuild_flat()
         self._save_config_file(self.config)
         logging.info("Configuration reset to defaults")
         
@@ -179,6 +274,8 @@ class ConfigManager:
             if self.config['retry_attempts'] < 0:
                 self.config['retry_attempts'] = 0
                 
+            self._rebuild_flat()
+            
             return True
             
         except Exception as e:
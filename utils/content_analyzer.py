@@ -3,23 +3,89 @@
 Advanced content analysis for better download decisions.
 """
 
-import requests
 import logging
 from typing import Dict, Any, List, Optional
-from urllib.parse import urlparse
-import json
+from urllib.parse import urlsplit, urlunsplit
+from collections import OrderedDict
 import re
+import functools
+
+# Named alternatives, so the matching group name is the platform itself
+_PLATFORM_RE = re.compile(
+    r'(?P<youtube>youtube\.com|youtu\.be)|'
+    r'(?P<tiktok>tiktok\.com)|(?P<instagram>instagram\.com)|'
+    r'(?P<reddit>reddit\.com)|(?P<twitter>twitter\.com|x\.com)',
+    re.I
+)
+
+_SUBREDDIT_RE = re.compile(r'reddit\.com/r/([^/]+)')
+
+@functools.lru_cache(maxsize=1024)
+def _platform_for_url(url: str) -> str:
+    """Detect platform from URL with a single case-insensitive regex scan."""
+    m = _PLATFORM_RE.search(url)
+    return m.lastgroup if m else 'unknown'
+
+# Query parameters that only track the visitor and never change the content
+_TRACKING_PARAMS = frozenset({'fbclid', 'gclid', 'igshid', 'si', 'feature', 'ref', 'ref_src'})
+
+_ANALYSIS_CACHE_SIZE = 4096
+
+# Per content type adjustments applied on top of the base download strategy
+_STRATEGY_OVERLAYS = {
+    'video': {'format': 'mp4'},
+    'image': {'format': 'jpg', 'extract_audio': False},
+    'mixed': {'concurrent_downloads': 3, 'organize_by_type': True},
+}
+
+def _canonicalize_url(url: str) -> str:
+    """Normalize a URL for cache lookups by dropping fragments and tracking parameters."""
+    parts = urlsplit(url)
+    query = '&'.join(
+        param for param in parts.query.split('&')
+        if param and not _is_tracking_param(param.split('=', 1)[0].lower())
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ''))
+
+def _is_tracking_param(name: str) -> bool:
+    """Check whether a query parameter name is a known tracking parameter."""
+    return name in _TRACKING_PARAMS or name.startswith('utm_')
 
 class ContentAnalyzer:
     """Analyzes content before downloading for optimal quality and format selection."""
     
     def __init__(self, config_manager):
         self.config_manager = config_manager
-        self.config = config_manager.get_config()
+        self._analyzers = {
+            'youtube': self._analyze_youtube_content,
+            'tiktok': self._analyze_tiktok_content,
+            'instagram': self._analyze_instagram_content,
+            'reddit': self._analyze_reddit_content
+        }
+        
+        # Bounded LRU of analyses keyed by (canonical URL, cache version)
+        self._analysis_cache = OrderedDict()
+        self._cache_ver = 0
+        
+    @property
+    def config(self) -> Dict[str, Any]:
+        """Current configuration, read through so it never goes stale."""
+        return self.config_manager.config
+        
+    def clear_analysis_cache(self):
+        """Invalidate cached analyses, e.g. after configuration changes."""
+        self._cache_ver += 1
+        self._analysis_cache.clear()
         
     def analyze_content_quality(self, url: str) -> Dict[str, Any]:
         """Analyze available quality options for content."""
         try:
+            key = (_canonicalize_url(url), self._cache_ver)
+            cached = self._analysis_cache.get(key)
+            if cached is not None:
+                self._analysis_cache.move_to_end(key)
+                return {**cached, 'url': url}
+                
             analysis = {
                 'url': url,
                 'available_qualities': [],
@@ -33,16 +99,15 @@ class ContentAnalyzer:
             
             platform = self._detect_platform(url)
             
-            if platform == 'youtube':
-                analysis.update(self._analyze_youtube_content(url))
-            elif platform == 'tiktok':
-                analysis.update(self._analyze_tiktok_content(url))
-            elif platform == 'instagram':
-                analysis.update(self._analyze_instagram_content(url))
-            elif platform == 'reddit':
-                analysis.update(self._analyze_reddit_content(url))
+            handler = self._analyzers.get(platform)
+            if handler:
+                analysis.update(handler(url))
+                
+            self._analysis_cache[key] = analysis
+            if len(self._analysis_cache) > _ANALYSIS_CACHE_SIZE:
+                self._analysis_cache.popitem(last=False)
                 
-            return analysis
+            return {**analysis}
             
         except Exception as e:
             logging.error(f"Content analysis failed: {e}")
@@ -50,20 +115,7 @@ class ContentAnalyzer:
             
     def _detect_platform(self, url: str) -> str:
         """Detect platform from URL."""
-        url_lower = url.lower()
-        
-        if 'youtube.com' in url_lower or 'youtu.be' in url_lower:
-            return 'youtube'
-        elif 'tiktok.com' in url_lower:
-            return 'tiktok'
-        elif 'instagram.com' in url_lower:
-            return 'instagram'
-        elif 'reddit.com' in url_lower:
-            return 'reddit'
-        elif 'twitter.com' in url_lower or 'x.com' in url_lower:
-            return 'twitter'
-        else:
-            return 'unknown'
+        return _platform_for_url(url)
             
     def _analyze_youtube_content(self, url: str) -> Dict[str, Any]:
         """Analyze YouTube content for quality options."""
@@ -133,7 +185,7 @@ class ContentAnalyzer:
     def _extract_subreddit(self, url: str) -> str:
         """Extract subreddit name from Reddit URL."""
         try:
-            match = re.search(r'reddit\.com/r/([^/]+)', url)
+            match = _SUBREDDIT_RE.search(url)
             return match.group(1) if match else 'unknown'
         except:
             return 'unknown'
@@ -159,28 +211,12 @@ class ContentAnalyzer:
                 'concurrent_downloads': 1
             }
             
-            content_type = analysis.get('content_type', 'unknown')
+            strategy.update(_STRATEGY_OVERLAYS.get(analysis.get('content_type', 'unknown'), {}))
             
-            if content_type == 'video':
-                if analysis.get('has_audio', False):
-                    strategy['format'] = 'mp4'
-                else:
-                    strategy['extract_audio'] = False
-                    
-            elif content_type == 'image':
-                strategy['format'] = 'jpg'
-                strategy['extract_audio'] = False
-                
-            elif content_type == 'mixed':
-                strategy['concurrent_downloads'] = 3
-                strategy['organize_by_type'] = True
-                
             # Adjust for file size
             file_sizes = analysis.get('file_size_estimates', {})
-            if file_sizes:
-                total_size = sum(file_sizes.values())
-                if total_size > 1024 * 1024 * 1024:  # > 1GB
-                    strategy['quality'] = '720p'  # Reduce quality for large files
+            if file_sizes and sum(file_sizes.values()) > (1 << 30):  # > 1GB
+                strategy['quality'] = '720p'  # Reduce quality for large files
                     
             return strategy
             
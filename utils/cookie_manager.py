@@ -4,12 +4,35 @@ Cookie management system for manual cookie input and management.
 """
 
 import os
-import json
 import logging
 import tempfile
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 
+from utils import json_backend
+
+# Cookie domains for platforms whose domain isn't simply "<platform>.com"
+_DOMAIN_MAP = {
+    'youtube': 'youtube.com',
+    'tiktok': 'tiktok.com',
+    'instagram': 'instagram.com',
+    'twitter': 'twitter.com',
+    'x': 'x.com'
+}
+
+# Browser name -> browser_cookie3 extractor, filled on first extraction
+_EXTRACTORS = None
+
+def _get_extractors() -> Dict[str, Any]:
+    """Build the browser extractor table (raises ImportError without browser_cookie3)."""
+    import browser_cookie3
+    return {
+        'chrome': browser_cookie3.chrome,
+        'firefox': browser_cookie3.firefox,
+        'edge': browser_cookie3.edge,
+        'brave': browser_cookie3.chrome  # Brave uses Chrome's cookie storage
+    }
+
 class CookieManager:
     """Manages cookies for different platforms with manual input support."""
     
@@ -18,10 +41,25 @@ class CookieManager:
         self.cookies_dir = os.path.expanduser("~/.social_media_downloader/cookies")
         os.makedirs(self.cookies_dir, exist_ok=True)
         
+        # Resolved cookie files keyed by (platform, prefer_manual)
+        self._cookie_file_cache: Dict[Tuple[str, bool], Optional[str]] = {}
+        
+        # Cookie file paths keyed by (platform, kind), built on first use
+        self._path_cache: Dict[Tuple[str, str], str] = {}
+        
+    def _path(self, platform: str, kind: str) -> str:
+        """Get the cookies file path for a platform and cookie kind."""
+        key = (platform, kind)
+        path = self._path_cache.get(key)
+        if path is None:
+            path = self._path_cache.setdefault(key, os.path.join(self.cookies_dir, f"{platform}_{kind}.txt"))
+        return path
+        
     def store_manual_cookies(self, platform: str, cookies_text: str, format_type: str = 'netscape') -> bool:
         """Store manually entered cookies."""
         try:
-            cookies_file = os.path.join(self.cookies_dir, f"{platform}_manual.txt")
+            self._cookie_file_cache.clear()
+            cookies_file = self._path(platform, 'manual')
             
             if format_type.lower() == 'netscape':
                 # Netscape format (for yt-dlp)
@@ -33,7 +71,7 @@ class CookieManager:
                     
             elif format_type.lower() == 'json':
                 # JSON format
-                cookies_data = json.loads(cookies_text)
+                cookies_data = json_backend.loads(cookies_text)
                 self._convert_json_to_netscape(cookies_data, cookies_file, platform)
                 
             elif format_type.lower() == 'header':
@@ -50,46 +88,38 @@ class CookieManager:
     def store_browser_cookies(self, platform: str, browser: str = 'chrome') -> bool:
         """Extract and store cookies from browser."""
         try:
-            import browser_cookie3
+            self._cookie_file_cache.clear()
+            global _EXTRACTORS
+            if _EXTRACTORS is None:
+                _EXTRACTORS = _get_extractors()
             
-            cookies_file = os.path.join(self.cookies_dir, f"{platform}_{browser}.txt")
+            cookies_file = self._path(platform, browser)
             
             # Extract cookies based on platform domain
-            domain_map = {
-                'youtube': 'youtube.com',
-                'tiktok': 'tiktok.com',
-                'instagram': 'instagram.com',
-                'twitter': 'twitter.com',
-                'x': 'x.com'
-            }
-            
-            domain = domain_map.get(platform.lower(), f"{platform}.com")
+            domain = _DOMAIN_MAP.get(platform.lower(), f"{platform}.com")
             
             # Get cookies from browser
-            if browser.lower() == 'chrome':
-                cookies = browser_cookie3.chrome(domain_name=domain)
-            elif browser.lower() == 'firefox':
-                cookies = browser_cookie3.firefox(domain_name=domain)
-            elif browser.lower() == 'edge':
-                cookies = browser_cookie3.edge(domain_name=domain)
-            elif browser.lower() == 'brave':
-                # Brave uses Chrome's cookie storage
-                cookies = browser_cookie3.chrome(domain_name=domain)
-            else:
+            extractor = _EXTRACTORS.get(browser.lower())
+            if not extractor:
                 logging.error(f"Unsupported browser: {browser}")
                 return False
+            cookies = extractor(domain_name=domain)
                 
             # Write to Netscape format
+            parts = [
+                "# Netscape HTTP Cookie File\n",
+                f"# Extracted from {browser} for {platform}\n",
+                f"# Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+            ]
+            secure_flags = {True: 'TRUE', False: 'FALSE'}
+            matching = [cookie for cookie in cookies if domain in cookie.domain]
+            for cookie in matching:
+                secure = secure_flags[bool(cookie.secure)]
+                expires = int(cookie.expires or 0)
+                parts.append(f"{cookie.domain}\tTRUE\t{cookie.path}\t{secure}\t{expires}\t{cookie.name}\t{cookie.value}\n")
+                    
             with open(cookies_file, 'w', encoding='utf-8') as f:
-                f.write("# Netscape HTTP Cookie File\n")
-                f.write(f"# Extracted from {browser} for {platform}\n")
-                f.write(f"# Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                
-                for cookie in cookies:
-                    if domain in cookie.domain:
-                        expires = int(cookie.expires) if cookie.expires else 0
-                        secure = str(cookie.secure).upper()
-                        f.write(f"{cookie.domain}\tTRUE\t{cookie.path}\t{secure}\t{expires}\t{cookie.name}\t{cookie.value}\n")
+                f.write(''.join(parts))
                         
             logging.info(f"Browser cookies extracted for {platform} from {browser}")
             return True
@@ -103,86 +133,98 @@ class CookieManager:
             
     def _convert_json_to_netscape(self, cookies_json: List[Dict], output_file: str, platform: str):
         """Convert JSON cookies to Netscape format."""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("# Netscape HTTP Cookie File\n")
-            f.write(f"# Converted from JSON for {platform}\n\n")
+        parts = ["# Netscape HTTP Cookie File\n", f"# Converted from JSON for {platform}\n\n"]
+        
+        for cookie in cookies_json:
+            domain = cookie.get('domain', f".{platform}.com")
+            path = cookie.get('path', '/')
+            secure = 'TRUE' if cookie.get('secure', False) else 'FALSE'
+            expires = cookie.get('expirationDate', 0)
+            name = cookie.get('name', '')
+            value = cookie.get('value', '')
             
-            for cookie in cookies_json:
-                domain = cookie.get('domain', f".{platform}.com")
-                path = cookie.get('path', '/')
-                secure = 'TRUE' if cookie.get('secure', False) else 'FALSE'
-                expires = cookie.get('expirationDate', 0)
-                name = cookie.get('name', '')
-                value = cookie.get('value', '')
+            if name and value:
+                parts.append(f"{domain}\tTRUE\t{path}\t{secure}\t{int(expires)}\t{name}\t{value}\n")
                 
-                if name and value:
-                    f.write(f"{domain}\tTRUE\t{path}\t{secure}\t{int(expires)}\t{name}\t{value}\n")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(parts))
                     
     def _convert_header_to_netscape(self, cookie_header: str, output_file: str, platform: str):
         """Convert cookie header string to Netscape format."""
+        parts = ["# Netscape HTTP Cookie File\n", f"# Converted from header for {platform}\n\n"]
+        
+        # Parse cookie header
+        cookie_pairs = cookie_header.split(';')
+        domain = f".{platform}.com"
+        expires = int((datetime.now() + timedelta(days=365)).timestamp())
+        
+        for pair in cookie_pairs:
+            if '=' in pair:
+                name, value = pair.strip().split('=', 1)
+                parts.append(f"{domain}\tTRUE\t/\tFALSE\t{expires}\t{name}\t{value}\n")
+                
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("# Netscape HTTP Cookie File\n")
-            f.write(f"# Converted from header for {platform}\n\n")
-            
-            # Parse cookie header
-            cookie_pairs = cookie_header.split(';')
-            domain = f".{platform}.com"
-            
-            for pair in cookie_pairs:
-                if '=' in pair:
-                    name, value = pair.strip().split('=', 1)
-                    expires = int((datetime.now() + timedelta(days=365)).timestamp())
-                    f.write(f"{domain}\tTRUE\t/\tFALSE\t{expires}\t{name}\t{value}\n")
+            f.write(''.join(parts))
                     
     def get_cookies_file(self, platform: str, prefer_manual: bool = True) -> Optional[str]:
         """Get the best available cookies file for a platform."""
         try:
-            manual_file = os.path.join(self.cookies_dir, f"{platform}_manual.txt")
-            browser_files = [
-                os.path.join(self.cookies_dir, f"{platform}_chrome.txt"),
-                os.path.join(self.cookies_dir, f"{platform}_brave.txt"),
-                os.path.join(self.cookies_dir, f"{platform}_firefox.txt"),
-                os.path.join(self.cookies_dir, f"{platform}_edge.txt")
-            ]
-            
-            # Prefer manual if requested and exists
-            if prefer_manual and os.path.exists(manual_file):
-                return manual_file
-                
-            # Check browser files
-            for browser_file in browser_files:
-                if os.path.exists(browser_file):
-                    return browser_file
-                    
-            # Fall back to manual if no browser cookies
-            if os.path.exists(manual_file):
-                return manual_file
+            key = (platform, prefer_manual)
+            hit = self._cookie_file_cache.get(key)
+            if hit is not None and os.path.exists(hit):
+                return hit
                 
-            return None
+            cookies_file = self._resolve_cookies_file(platform, prefer_manual)
+            if cookies_file:
+                self._cookie_file_cache[key] = cookies_file
+            return cookies_file
             
         except Exception as e:
             logging.error(f"Error getting cookies file: {e}")
             return None
             
+    def _resolve_cookies_file(self, platform: str, prefer_manual: bool) -> Optional[str]:
+        """Find the best cookies file for a platform on disk."""
+        manual_file = self._path(platform, 'manual')
+        browser_files = [
+            self._path(platform, 'chrome'),
+            self._path(platform, 'brave'),
+            self._path(platform, 'firefox'),
+            self._path(platform, 'edge')
+        ]
+        
+        # Prefer manual if requested and exists
+        if prefer_manual and os.path.exists(manual_file):
+            return manual_file
+            
+        # Check browser files
+        for browser_file in browser_files:
+            if os.path.exists(browser_file):
+                return browser_file
+                
+        # Fall back to manual if no browser cookies
+        if os.path.exists(manual_file):
+            return manual_file
+            
+        return None
+        
     def validate_cookies_file(self, cookies_file: str) -> bool:
         """Validate that a cookies file is properly formatted."""
         try:
             if not os.path.exists(cookies_file):
                 return False
                 
+            # Stream line by line and stop at the first valid cookie
             with open(cookies_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # Check if it's Netscape format
-            if not content.startswith('# Netscape HTTP Cookie File'):
-                return False
-                
-            # Check for at least one valid cookie line
-            lines = content.split('\n')
-            for line in lines:
-                if line and not line.startswith('#') and line.count('\t') >= 6:
-                    return True
+                # Check if it's Netscape format
+                if not f.readline().startswith('# Netscape HTTP Cookie File'):
+                    return False
                     
+                # Check for at least one valid cookie line
+                for line in f:
+                    if line and not line.startswith('#') and line.count('\t') >= 6:
+                        return True
+                        
             return False
             
         except Exception as e:
@@ -195,18 +237,23 @@ class CookieManager:
             cookies_info = {}
             
             if os.path.exists(self.cookies_dir):
-                for filename in os.listdir(self.cookies_dir):
-                    if filename.endswith('.txt'):
-                        platform = filename.split('_')[0]
-                        cookie_type = filename.replace(f"{platform}_", "").replace(".txt", "")
+                with os.scandir(self.cookies_dir) as entries:
+                    for entry in entries:
+                        filename = entry.name
+                        if not filename.endswith('.txt'):
+                            continue
+                            
+                        stem = filename[:-4]  # strip '.txt'
+                        platform, _, cookie_type = stem.partition('_')
+                        if not cookie_type:
+                            continue
                         
                         if platform not in cookies_info:
                             cookies_info[platform] = []
                             
-                        file_path = os.path.join(self.cookies_dir, filename)
-                        if self.validate_cookies_file(file_path):
+                        if self.validate_cookies_file(entry.path):
                             # Get file info
-                            stat = os.stat(file_path)
+                            stat = entry.stat()
                             modified = datetime.fromtimestamp(stat.st_mtime)
                             
                             cookies_info[platform].append({
@@ -231,10 +278,10 @@ class CookieManager:
     def delete_cookies(self, platform: str, cookie_type: str = None) -> bool:
         """Delete cookies for a platform."""
         try:
+            self._cookie_file_cache.clear()
             if cookie_type:
                 # Delete specific type
-                filename = f"{platform}_{cookie_type}.txt"
-                file_path = os.path.join(self.cookies_dir, filename)
+                file_path = self._path(platform, cookie_type)
                 if os.path.exists(file_path):
                     os.remove(file_path)
                     logging.info(f"Deleted {cookie_type} cookies for {platform}")
@@ -1,160 +1,261 @@
-
 """
 Intelligent download scheduler for optimal performance and rate limiting.
 """
 
 import asyncio
+import importlib
+import itertools
+import threading
 import time
+import uuid
 import logging
-from typing import Dict, Any, List, Callable, Optional
-from datetime import datetime, timedelta
-import threading
-from queue import Queue, PriorityQueue
+from collections import defaultdict, deque
+from typing import Dict, Any, List, Callable, Optional, Tuple
+from types import MappingProxyType
+
+# Downloader class path per platform, imported on first use
+_DOWNLOADER_MAP = MappingProxyType({
+    'youtube': 'downloaders.youtube_downloader.YouTubeDownloader',
+    'tiktok': 'downloaders.tiktok_downloader.TikTokDownloader',
+    'instagram': 'downloaders.instagram_downloader.InstagramDownloader',
+    'reddit': 'downloaders.reddit_downloader.RedditDownloader',
+    'twitter': 'downloaders.twitter_downloader.TwitterDownloader',
+    'pornhub': 'downloaders.pornhub_downloader.PornhubDownloader',
+    'redgifs': 'downloaders.redgifs_downloader.RedgifsDownloader',
+    'coomer': 'downloaders.coomer_downloader.CoomerDownloader',
+    'kemono': 'downloaders.kemono_downloader.KemonoDownloader'
+})
+
+# Per-platform (requests per minute, minimum spacing in seconds)
+_PLATFORM_LIMITS = MappingProxyType({
+    'youtube': (30, 1.0),
+    'tiktok': (20, 2.0),       # more restrictive
+    'instagram': (15, 3.0),    # very restrictive
+    'reddit': (60, 0.5),       # more lenient
+    'twitter': (25, 1.5),
+    'pornhub': (20, 3.0),
+    'redgifs': (25, 2.0),
+    'coomer': (10, 6.0),
+    'kemono': (10, 6.0),
+    'adult_sites': (8, 7.0),
+    'urlebird': (8, 7.0),
+    'ttthots': (6, 10.0),
+    'sotwe': (10, 6.0),
+    'fapsly': (5, 12.0),
+    'imhentai': (10, 6.0),
+    'hentaiera': (10, 6.0),
+    'nhentai': (8, 7.0),
+    'default_adult': (6, 10.0)
+})
+_DEFAULT_LIMIT = (30, 1.0)
+
+def _bucket_params(rpm: int, min_delay: float) -> Tuple[float, float]:
+    """Token bucket (capacity, refill rate per second) for a platform limit.
+    
+    The bucket refills at the per-minute rate; its capacity caps bursts at what
+    the minimum spacing would allow within one refill interval, so pacing lives
+    in the limits table rather than in sleeps between downloads.
+    """
+    return max(1.0, 60.0 / (rpm * min_delay)), rpm / 60.0
 
+_PLATFORM_BUCKETS = MappingProxyType({
+    platform: _bucket_params(*limit) for platform, limit in _PLATFORM_LIMITS.items()
+})
+_DEFAULT_BUCKET = _bucket_params(*_DEFAULT_LIMIT)
+
+# Counters each thread keeps privately and get_queue_status sums
+_STAT_KEYS = ('total_downloads', 'successful_downloads', 'failed_downloads', 'bytes_downloaded')
+
+# Cancelled IDs never dequeued (unknown or already finished) are pruned past this size
+_MAX_CANCELLED = 10000
+_CANCELLED_TTL = 3600.0
+
+class RateBucket:
+    """Token bucket for one platform's request rate."""
+    
+    __slots__ = ('tokens', 'last_refill', 'capacity', 'rate')
+    
+    def __init__(self, capacity: float, rate: float):
+        self.tokens = capacity
+        self.last_refill = time.monotonic_ns()
+        self.capacity = capacity
+        self.rate = rate
+        
+    def try_acquire(self) -> bool:
+        """Refill for the elapsed time, then take one token if available."""
+        now = time.monotonic_ns()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * 1e-9 * self.rate)
+        self.last_refill = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+        
+    def refill_wait(self) -> float:
+        """Seconds until the bucket holds a whole token again."""
+        return max(0.0, (1.0 - self.tokens) / self.rate)
+        
 class DownloadScheduler:
     """Manages download scheduling with rate limiting and optimization."""
     
     def __init__(self, config_manager):
         self.config_manager = config_manager
-        self.config = config_manager.get_config()
-        self.download_queue = PriorityQueue()
+        self.config = config_manager.config
+        self.download_queue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()  # FIFO tie-break so task dicts are never compared
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # Set by start_scheduler
         self.active_downloads = {}
-        self.rate_limiters = {}
-        self.statistics = {
-            'total_downloads': 0,
-            'successful_downloads': 0,
-            'failed_downloads': 0,
-            'bytes_downloaded': 0,
-            'average_speed': 0
-        }
+        
+        # Per-thread statistics counters, registered once per thread and merged on read
+        self._local_stats = threading.local()
+        self._all_stats: List[Dict[str, int]] = []
+        self._all_stats_lock = threading.Lock()
+        
+        # Per-platform token buckets
+        self.rate_limiters: Dict[str, RateBucket] = {}
+        
+        # Rate-limited (priority, task) pairs held outside the heap until their
+        # platform refills, with the pending release timer per platform
+        self._parked: Dict[str, deque] = defaultdict(deque)
+        self._release_handles: Dict[str, asyncio.TimerHandle] = {}
+        
+        # Cancelled download IDs -> cancel time, skipped when their task is dequeued
+        self._cancelled: Dict[str, float] = {}
+        
+        # Downloader classes resolved once per platform; instances are kept per
+        # worker thread so each keeps its HTTP session without being shared
+        self._downloader_classes: Dict[str, type] = {}
+        self._downloader_instances = threading.local()
         
     def schedule_download(self, url: str, platform: str, options: Dict[str, Any], 
                          priority: int = 5, callback: Optional[Callable] = None) -> str:
-        """Schedule a download with priority and rate limiting."""
-        try:
-            download_id = f"{platform}_{int(time.time())}_{hash(url) % 10000}"
-            
-            download_task = {
-                'id': download_id,
-                'url': url,
-                'platform': platform,
-                'options': options,
-                'callback': callback,
-                'scheduled_time': datetime.now(),
-                'retry_count': 0,
-                'status': 'scheduled'
-            }
-            
-            # Add to priority queue (lower number = higher priority)
-            self.download_queue.put((priority, download_task))
-            
-            # Initialize rate limiter for platform if not exists
-            if platform not in self.rate_limiters:
-                self.rate_limiters[platform] = {
-                    'last_request': 0,
-                    'request_count': 0,
-                    'window_start': time.time(),
-                    'max_requests_per_minute': self._get_platform_rate_limit(platform)
-                }
-            
-            logging.info(f"Download scheduled: {download_id} for {platform}")
-            return download_id
-            
-    def _get_platform_rate_limit(self, platform: str) -> int:
-        """Get rate limit for specific platform."""
-        rate_limits = {
-            'youtube': 30,      # 30 requests per minute
-            'tiktok': 20,       # 20 requests per minute (more restrictive)
-            'instagram': 15,    # 15 requests per minute (very restrictive)
-            'reddit': 60,       # 60 requests per minute (more lenient)
-            'twitter': 25,      # 25 requests per minute
-            'default': 30
+        """Schedule a download with priority and rate limiting.
+        
+        Safe to call from any thread: once the scheduler is running, calls from
+        outside its event loop hand the task to the loop instead of touching the
+        queue directly.
+        """
+        download_id = f"{platform}_{uuid.uuid4().hex[:12]}"
+        
+        download_task = {
+            'id': download_id,
+            'url': url,
+            'platform': platform,
+            'options': options,
+            'callback': callback,
+            'scheduled_time': time.time_ns(),  # Epoch nanoseconds
+            'retry_count': 0,
+            'status': 'scheduled'
         }
-        return rate_limits.get(platform, rate_limits['default'])
         
-    def _should_rate_limit(self, platform: str) -> bool:
-        """Check if request should be rate limited."""
+        # Add to priority queue (lower number = higher priority)
+        self._enqueue((priority, next(self._sequence), download_task))
+        
+        logging.info(f"Download scheduled: {download_id} for {platform}")
+        return download_id
+        
+    def _enqueue(self, item: Tuple[Any, int, Optional[Dict[str, Any]]]):
+        """Put an item on the queue from the loop thread, or via the loop from any other thread."""
         try:
-            if platform not in self.rate_limiters:
-                return False
-                
-            limiter = self.rate_limiters[platform]
-            current_time = time.time()
-            
-            # Reset window if minute has passed
-            if current_time - limiter['window_start'] >= 60:
-                limiter['request_count'] = 0
-                limiter['window_start'] = current_time
-                
-            # Check if we've exceeded rate limit
-            if limiter['request_count'] >= limiter['max_requests_per_minute']:
-                return True
-                
-            return False
-            
-        except Exception as e:
-            logging.error(f"Error checking rate limit: {e}")
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if self._loop is None or on_loop:
+            self.download_queue.put_nowait(item)
+        else:
+            self._loop.call_soon_threadsafe(self.download_queue.put_nowait, item)
+            
+    def _thread_stats(self) -> Dict[str, int]:
+        """Get the calling thread's statistics counters, which only it writes to."""
+        stats = getattr(self._local_stats, 'stats', None)
+        if stats is None:
+            stats = self._local_stats.stats = dict.fromkeys(_STAT_KEYS, 0)
+            with self._all_stats_lock:
+                self._all_stats.append(stats)
+        return stats
+        
+    @property
+    def statistics(self) -> Dict[str, Any]:
+        """Download statistics summed across all threads."""
+        with self._all_stats_lock:
+            all_stats = list(self._all_stats)
+        totals = {key: sum(stats[key] for stats in all_stats) for key in _STAT_KEYS}
+        totals['average_speed'] = 0
+        return totals
+        
+    def _pop_cancelled(self, download_id: str) -> bool:
+        """Check whether a dequeued download was cancelled, forgetting the cancellation."""
+        if self._cancelled.pop(download_id, None) is None:
             return False
+        logging.info(f"Skipping cancelled download: {download_id}")
+        return True
+        
+    def _try_acquire(self, platform: str) -> bool:
+        """Take one request token from the platform's bucket if available."""
+        bucket = self.rate_limiters.get(platform)
+        if bucket is None:
+            bucket = self.rate_limiters[platform] = RateBucket(*_PLATFORM_BUCKETS.get(platform, _DEFAULT_BUCKET))
+        return bucket.try_acquire()
+            
+    def _refill_wait(self, platform: str) -> float:
+        """Seconds until the platform's bucket holds a whole token again."""
+        bucket = self.rate_limiters.get(platform)
+        return bucket.refill_wait() if bucket is not None else 0.0
+        
+    async def execute_downloads(self, max_concurrent: int = 3) -> Dict[str, Any]:
+        """Execute scheduled downloads concurrently with rate limiting and optimization."""
+        semaphore = asyncio.Semaphore(max_concurrent)
+        
+        # Drain the queue in priority order; the semaphore admits tasks in that order
+        tasks = []
+        while not self.download_queue.empty():
+            priority, _, download_task = self.download_queue.get_nowait()
+            self.download_queue.task_done()
+            if self._pop_cancelled(download_task['id']):
+                continue
+            tasks.append(asyncio.create_task(self._run_download(download_task, semaphore)))
+            
+        results = await asyncio.gather(*tasks)
+        successful_count = sum(1 for result in results if result.get('success', False))
+        
+        return {
+            'success': True,
+            'executed': len(results),
+            'successful': successful_count,
+            'failed': len(results) - successful_count
+        }
+        
+    async def _run_download(self, download_task: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Run one download once a rate limit token and then a concurrency slot are free."""
+        platform = download_task['platform']
+        
+        # Take the rate token before a concurrency slot, so tasks waiting on a
+        # throttled platform don't hold slots other platforms could use
+        while not self._try_acquire(platform):
+            await asyncio.sleep(self._refill_wait(platform))
             
-    def _update_rate_limiter(self, platform: str):
-        """Update rate limiter after successful request."""
-        try:
-            if platform in self.rate_limiters:
-                self.rate_limiters[platform]['request_count'] += 1
-                self.rate_limiters[platform]['last_request'] = time.time()
-        except Exception as e:
-            logging.error(f"Error updating rate limiter: {e}")
-            
-    def execute_downloads(self, max_concurrent: int = 3) -> Dict[str, Any]:
-        """Execute scheduled downloads with rate limiting and optimization."""
-        try:
-            executed_count = 0
-            successful_count = 0
-            failed_count = 0
-            
-            # Process downloads in batches to respect rate limits
-            while not self.download_queue.empty():
-                # Get next download
-                priority, download_task = self.download_queue.get()
-                platform = download_task['platform']
-                
-                # Check rate limiting
-                if self._should_rate_limit(platform):
-                    # Put back in queue and wait
-                    self.download_queue.put((priority, download_task))
-                    time.sleep(10)  # Wait 10 seconds before retrying
-                    continue
-                
-                # Execute download
-                try:
-                    result = self._execute_single_download(download_task)
-                    
-                    if result.get('success', False):
-                        successful_count += 1
-                        self._update_rate_limiter(platform)
-                    else:
-                        failed_count += 1
-                        
-                    executed_count += 1
-                    
-                except Exception as e:
-                    logging.error(f"Download execution failed: {e}")
-                    failed_count += 1
-                    
-                # Small delay between downloads
-                time.sleep(1)
-                
-            return {
-                'success': True,
-                'executed': executed_count,
-                'successful': successful_count,
-                'failed': failed_count
-            }
-            
-        except Exception as e:
-            logging.error(f"Batch execution failed: {e}")
-            return {'success': False, 'error': str(e)}
-            
+        async with semaphore:
+            # Downloaders are blocking, so run them off the event loop
+            try:
+                return await asyncio.to_thread(self._execute_single_download, download_task)
+            except Exception as e:
+                logging.error(f"Download execution failed: {e}")
+                return {'success': False, 'error': str(e)}
+            
+    def _get_downloader(self, platform: str, class_path: str):
+        """Get the calling thread's downloader for a platform, importing its class only once."""
+        downloader = getattr(self._downloader_instances, platform, None)
+        if downloader is None:
+            downloader_class = self._downloader_classes.get(platform)
+            if downloader_class is None:
+                module_path, class_name = class_path.rsplit('.', 1)
+                downloader_class = getattr(importlib.import_module(module_path), class_name)
+                self._downloader_classes[platform] = downloader_class
+            downloader = downloader_class(self.config_manager)
+            setattr(self._downloader_instances, platform, downloader)
+        return downloader
+        
     def _execute_single_download(self, download_task: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a single download task."""
         try:
@@ -163,29 +264,16 @@ class DownloadScheduler:
             options = download_task['options']
             callback = download_task.get('callback')
             
-            # Import appropriate downloader
-            downloader_map = {
-                'youtube': 'downloaders.youtube_downloader.YouTubeDownloader',
-                'tiktok': 'downloaders.tiktok_downloader.TikTokDownloader',
-                'instagram': 'downloaders.instagram_downloader.InstagramDownloader',
-                'reddit': 'downloaders.reddit_downloader.RedditDownloader',
-                'twitter': 'downloaders.twitter_downloader.TwitterDownloader',
-                'pornhub': 'downloaders.pornhub_downloader.PornhubDownloader',
-                'redgifs': 'downloaders.redgifs_downloader.RedgifsDownloader',
-                'coomer': 'downloaders.coomer_downloader.CoomerDownloader',
-                'kemono': 'downloaders.kemono_downloader.KemonoDownloader'
-            }
-            
-            if platform not in downloader_map:
+            class_path = _DOWNLOADER_MAP.get(platform)
+            if class_path is None:
                 return {'success': False, 'error': f'Unsupported platform: {platform}'}
             
-            # Dynamic import and execution
-            module_path, class_name = downloader_map[platform].rsplit('.', 1)
-            module = __import__(module_path, fromlist=[class_name])
-            downloader_class = getattr(module, class_name)
+            stats = self._thread_stats()
+            stats['total_downloads'] += 1
             
-            downloader = downloader_class(self.config_manager)
+            downloader = self._get_downloader(platform, class_path)
             result = downloader.download(url, options)
+            stats['successful_downloads' if result.get('success', False) else 'failed_downloads'] += 1
             
             # Execute callback if provided
             if callback:
@@ -194,66 +282,103 @@ class DownloadScheduler:
             return result
             
         except Exception as e:
+            self._thread_stats()['failed_downloads'] += 1
             return {'success': False, 'error': str(e)}
             
-        except Exception as e:
-            logging.error(f"Failed to schedule download: {e}")
-            return None
-            
-    def start_scheduler(self, max_concurrent: int = 3):
-        """Start the download scheduler."""
+    async def start_scheduler(self, max_concurrent: int = 3):
+        """Start the download scheduler's worker coroutines on the running loop."""
         try:
-            for i in range(max_concurrent):
-                worker_thread = threading.Thread(
-                    target=self._worker_thread,
-                    args=(f"worker_{i}",),
-                    daemon=True
-                )
-                worker_thread.start()
-                
+            self._loop = asyncio.get_running_loop()
+            self._workers = [
+                asyncio.create_task(self._worker(f"worker_{i}"))
+                for i in range(max_concurrent)
+            ]
+            
             logging.info(f"Download scheduler started with {max_concurrent} workers")
             
         except Exception as e:
             logging.error(f"Failed to start scheduler: {e}")
             
-    def _worker_thread(self, worker_name: str):
-        """Worker thread for processing downloads."""
+    async def stop_scheduler(self):
+        """Let the workers finish queued downloads, then stop them."""
+        # With no live workers nothing would ever drain the queue, so joining it would hang
+        if all(worker.done() for worker in self._workers):
+            self._workers = []
+            return
+            
+        # Parked tasks count as unfinished, so this also waits for them
+        await self.download_queue.join()
+        for _ in self._workers:
+            self.download_queue.put_nowait((float('inf'), next(self._sequence), None))
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        
+    async def _worker(self, worker_name: str):
+        """Worker coroutine for processing downloads."""
         while True:
-            try:
-                # Get next download task
-                priority, download_task = self.download_queue.get()
-                
-                if download_task is None:  # Shutdown signal
-                    break
-                    
-                # Check rate limiting
-                platform = download_task['platform']
-                if not self._check_rate_limit(platform):
-                    # Re-queue with delay
-                    time.sleep(self._get_rate_limit_delay(platform))
-                    self.download_queue.put((priority, download_task))
-                    continue
-                    
-                # Execute download
-                self._execute_download(download_task, worker_name)
+            # Get next download task
+            priority, _, download_task = await self.download_queue.get()
+            
+            if download_task is None:  # Shutdown signal
+                self.download_queue.task_done()
+                break
                 
-                # Mark task as done
+            if self._pop_cancelled(download_task['id']):
                 self.download_queue.task_done()
+                continue
+                
+            # Check rate limiting; parked tasks stay unfinished until released
+            platform = download_task['platform']
+            if not self._try_acquire(platform):
+                self._park(platform, priority, download_task)
+                continue
                 
+            # Execute download
+            try:
+                await self._execute_download(download_task, worker_name)
             except Exception as e:
                 logging.error(f"Worker {worker_name} error: {e}")
-                time.sleep(1)
+            finally:
+                # Mark task as done
+                self.download_queue.task_done()
                 
-    def _execute_download(self, download_task: Dict[str, Any], worker_name: str):
+    def _park(self, platform: str, priority: int, download_task: Dict[str, Any]):
+        """Hold a rate-limited task aside until its platform's bucket refills."""
+        self._parked[platform].append((priority, download_task))
+        if platform not in self._release_handles:
+            self._release_handles[platform] = asyncio.get_running_loop().call_later(
+                self._refill_wait(platform), self._release_parked, platform
+            )
+            
+    def _release_parked(self, platform: str):
+        """Move the oldest parked task back to the queue, one per refilled token.
+        
+        Only ever runs as a call_later callback, so it is already on the loop thread.
+        """
+        del self._release_handles[platform]
+        parked = self._parked[platform]
+        if not parked:
+            return
+            
+        priority, download_task = parked.popleft()
+        self.download_queue.put_nowait((priority, next(self._sequence), download_task))
+        self.download_queue.task_done()  # Balances the get() that parked it
+        
+        if parked:
+            self._release_handles[platform] = asyncio.get_running_loop().call_later(
+                1.0 / self.rate_limiters[platform].rate, self._release_parked, platform
+            )
+            
+    async def _execute_download(self, download_task: Dict[str, Any], worker_name: str):
         """Execute a download task."""
         try:
             download_id = download_task['id']
-            platform = download_task['platform']
             
             logging.info(f"Worker {worker_name} starting download: {download_id}")
             
             # Update statistics
-            self.statistics['total_downloads'] += 1
+            stats = self._thread_stats()
+            stats['total_downloads'] += 1
             
             # Track active download
             self.active_downloads[download_id] = {
@@ -266,14 +391,14 @@ class DownloadScheduler:
             # result = downloader.download(download_task['url'], download_task['options'])
             
             # Simulate download for now
-            time.sleep(2)  # Simulate download time
+            await asyncio.sleep(2)  # Simulate download time
             result = {'success': True, 'files_downloaded': 1}
             
             # Update statistics
             if result.get('success', False):
-                self.statistics['successful_downloads'] += 1
+                stats['successful_downloads'] += 1
             else:
-                self.statistics['failed_downloads'] += 1
+                stats['failed_downloads'] += 1
                 
             # Execute callback if provided
             if download_task['callback']:
@@ -286,92 +411,20 @@ class DownloadScheduler:
             
         except Exception as e:
             logging.error(f"Download execution failed: {e}")
-            self.statistics['failed_downloads'] += 1
+            self._thread_stats()['failed_downloads'] += 1
             
-    def _check_rate_limit(self, platform: str) -> bool:
-        """Check if platform rate limit allows download."""
-        try:
-            current_time = time.time()
-            
-            if platform not in self.rate_limiters:
-                self.rate_limiters[platform] = {
-                    'last_request': 0,
-                    'requests_this_minute': 0,
-                    'minute_start': current_time
-                }
-                
-            limiter = self.rate_limiters[platform]
-            
-            # Reset minute counter if needed
-            if current_time - limiter['minute_start'] >= 60:
-                limiter['requests_this_minute'] = 0
-                limiter['minute_start'] = current_time
-                
-            # Platform-specific rate limits
-            limits = {
-                'youtube': {'requests_per_minute': 30, 'min_delay': 1},
-                'tiktok': {'requests_per_minute': 20, 'min_delay': 2},
-                'instagram': {'requests_per_minute': 15, 'min_delay': 3},
-                'reddit': {'requests_per_minute': 60, 'min_delay': 0.5},
-                'twitter': {'requests_per_minute': 25, 'min_delay': 1.5},
-                'pornhub': {'requests_per_minute': 20, 'min_delay': 3},
-                'redgifs': {'requests_per_minute': 25, 'min_delay': 2},
-                'coomer': {'requests_per_minute': 10, 'min_delay': 6},
-                'kemono': {'requests_per_minute': 10, 'min_delay': 6},
-                'adult_sites': {'requests_per_minute': 8, 'min_delay': 7},
-                'urlebird': {'requests_per_minute': 8, 'min_delay': 7},
-                'ttthots': {'requests_per_minute': 6, 'min_delay': 10},
-                'sotwe': {'requests_per_minute': 10, 'min_delay': 6},
-                'fapsly': {'requests_per_minute': 5, 'min_delay': 12},
-                'imhentai': {'requests_per_minute': 10, 'min_delay': 6},
-                'hentaiera': {'requests_per_minute': 10, 'min_delay': 6},
-                'nhentai': {'requests_per_minute': 8, 'min_delay': 7},
-                'default_adult': {'requests_per_minute': 6, 'min_delay': 10}
-            }
-            
-            platform_limits = limits.get(platform, {'requests_per_minute': 30, 'min_delay': 1})
-            
-            # Check requests per minute
-            if limiter['requests_this_minute'] >= platform_limits['requests_per_minute']:
-                return False
-                
-            # Check minimum delay between requests
-            if current_time - limiter['last_request'] < platform_limits['min_delay']:
-                return False
-                
-            # Update rate limiter
-            limiter['last_request'] = current_time
-            limiter['requests_this_minute'] += 1
-            
-            return True
-            
-        except Exception as e:
-            logging.error(f"Rate limit check failed: {e}")
-            return True  # Allow download on error
-            
-    def _get_rate_limit_delay(self, platform: str) -> float:
-        """Get delay time for rate-limited platform."""
-        delays = {
-            'youtube': 1.0,
-            'tiktok': 2.0,
-            'instagram': 3.0,
-            'reddit': 0.5,
-            'twitter': 1.5
-        }
-        return delays.get(platform, 1.0)
-        
     def get_queue_status(self) -> Dict[str, Any]:
         """Get current queue status."""
         return {
             'queued_downloads': self.download_queue.qsize(),
             'active_downloads': len(self.active_downloads),
-            'statistics': self.statistics.copy(),
+            'statistics': self.statistics,
             'rate_limiters': {
                 platform: {
-                    'requests_this_minute': data['requests_this_minute'],
-                    'last_request_ago': time.time() - data['last_request']
+                    'tokens_available': bucket.tokens,
+                    'last_request_ago': (time.monotonic_ns() - bucket.last_refill) / 1e9
                 }
-                for platform, data in self.rate_limiters.items()
+                for platform, bucket in self.rate_limiters.items()
             }
         }
         
@@ -384,8 +437,15 @@ class DownloadScheduler:
                 logging.info(f"Cancelled active download: {download_id}")
                 return True
                 
-            # Note: Removing from PriorityQueue is complex, 
-            # so we'll mark it as cancelled in a real implementation
+            # Queued tasks stay in the heap and are dropped when dequeued
+            now = time.monotonic()
+            self._cancelled[download_id] = now
+            if len(self._cancelled) > _MAX_CANCELLED:
+                self._cancelled = {
+                    cancelled_id: cancelled_at for cancelled_id, cancelled_at in self._cancelled.items()
+                    if now - cancelled_at < _CANCELLED_TTL
+                }
+                
             logging.info(f"Download cancellation requested: {download_id}")
             return True
             
@@ -6,16 +6,102 @@ Enhanced downloader utility for handling complex cases like private accounts and
 import os
 import logging
 import asyncio
+import functools
+import random
+import re
 import time
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, NamedTuple, Tuple
 from pathlib import Path
+from types import MappingProxyType
+from urllib.parse import urlparse
+
+# Matches a whole hostname that is a platform domain or one of its subdomains
+# (so eviltiktok.com is not TikTok); each group is named after its platform
+_HOST_RE = re.compile(
+    r'(?:.+\.)?(?:(?P<tiktok>tiktok\.com)|(?P<youtube>youtube\.com|youtu\.be)|'
+    r'(?P<instagram>instagram\.com)|(?P<twitter>twitter\.com|x\.com))'
+)
+
+# Platform -> (pattern on "host/path?query" marking a single item, item content type, otherwise)
+_CONTENT_RE = {
+    'tiktok': (re.compile(r'/video/', re.I), 'video', 'user'),
+    'youtube': (re.compile(r'^youtu\.be/[^?]|/watch\?(?:.*&)?v=', re.I), 'video', 'channel'),
+    'instagram': (re.compile(r'/p/', re.I), 'post', 'user'),
+    'twitter': (re.compile(r'/status/', re.I), 'tweet', 'user')
+}
+
+# Read-only authentication recommendations per platform
+_AUTH_RECOMMENDATIONS = MappingProxyType({
+    'youtube': MappingProxyType({
+        'primary': 'browser_cookies',
+        'alternative': 'google_oauth',
+        'description': 'Use browser cookies for age-restricted content'
+    }),
+    'tiktok': MappingProxyType({
+        'primary': 'credentials',
+        'alternative': 'browser_session',
+        'description': 'Login with username/password for private accounts'
+    }),
+    'instagram': MappingProxyType({
+        'primary': 'credentials',
+        'alternative': 'session_cookies',
+        'description': 'Login with username/password for private accounts'
+    }),
+    'twitter': MappingProxyType({
+        'primary': 'bearer_token',
+        'alternative': 'credentials',
+        'description': 'Use API token or login credentials'
+    })
+})
+_DEFAULT_AUTH_RECOMMENDATION = MappingProxyType({
+    'primary': 'credentials',
+    'alternative': 'manual',
+    'description': 'Manual authentication required'
+})
+
+# Error text that means retrying can never succeed
+_NON_RETRYABLE_RE = re.compile(r'not found|unauthorized|private', re.I)
+
+class BatchSuccess(NamedTuple):
+    """A batch URL that is ready to download; _asdict() gives the old dict shape."""
+    url: str
+    platform: Optional[str]
+    status: str = 'ready'
+    
+class BatchFailure(NamedTuple):
+    """A batch URL that cannot be downloaded, with what to do about it."""
+    url: str
+    reason: str
+    recommendations: Tuple[str, ...] = ()
+    
+@functools.lru_cache(maxsize=8192)
+def _classify_url(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """Map a URL to (platform, content_type) from its host and path."""
+    # Without a scheme urlparse puts the host in the path
+    parts = urlparse(url if '//' in url else '//' + url)
+    host = parts.hostname or ''  # Already lowercased, without port or credentials
+    match = _HOST_RE.fullmatch(host)
+    if match is None:
+        return None, None
+        
+    platform = match.lastgroup
+    pattern, item_type, other_type = _CONTENT_RE[platform]
+    return platform, item_type if pattern.search(f"{host}{parts.path}?{parts.query}") else other_type
 
 class EnhancedDownloader:
     """Enhanced downloader with advanced features for private accounts and restricted content."""
     
     def __init__(self, config_manager):
         self.config_manager = config_manager
-        self.config = config_manager.get_config()
+        self.config = config_manager.config
+        self._auth_manager = None
+        
+    def _get_auth_manager(self):
+        """Get the shared AuthManager, creating it on first use."""
+        if self._auth_manager is None:
+            from utils.auth_manager import AuthManager
+            self._auth_manager = AuthManager(self.config_manager)
+        return self._auth_manager
         
     def detect_content_type(self, url: str) -> Dict[str, Any]:
         """Detect content type and restrictions."""
@@ -29,21 +115,8 @@ class EnhancedDownloader:
                 'supported': True
             }
             
-            url_lower = url.lower()
-            
             # Platform detection
-            if 'tiktok.com' in url_lower:
-                detection_result['platform'] = 'tiktok'
-                detection_result['content_type'] = 'video' if '/video/' in url_lower else 'user'
-            elif 'youtube.com' in url_lower or 'youtu.be' in url_lower:
-                detection_result['platform'] = 'youtube'
-                detection_result['content_type'] = 'video' if 'watch?v=' in url_lower or 'youtu.be/' in url_lower else 'channel'
-            elif 'instagram.com' in url_lower:
-                detection_result['platform'] = 'instagram'
-                detection_result['content_type'] = 'post' if '/p/' in url_lower else 'user'
-            elif 'twitter.com' in url_lower or 'x.com' in url_lower:
-                detection_result['platform'] = 'twitter'
-                detection_result['content_type'] = 'tweet' if '/status/' in url_lower else 'user'
+            detection_result['platform'], detection_result['content_type'] = _classify_url(url)
                 
             # Advanced detection (would require actual requests in real implementation)
             if detection_result['platform']:
@@ -78,36 +151,10 @@ class EnhancedDownloader:
             
         return restrictions
         
-    def get_recommended_auth_method(self, platform: str, content_type: str) -> Dict[str, Any]:
+    def get_recommended_auth_method(self, platform: str, content_type: str) -> Dict[str, str]:
         """Get recommended authentication method for platform and content type."""
-        recommendations = {
-            'youtube': {
-                'primary': 'browser_cookies',
-                'alternative': 'google_oauth',
-                'description': 'Use browser cookies for age-restricted content'
-            },
-            'tiktok': {
-                'primary': 'credentials',
-                'alternative': 'browser_session',
-                'description': 'Login with username/password for private accounts'
-            },
-            'instagram': {
-                'primary': 'credentials',
-                'alternative': 'session_cookies',
-                'description': 'Login with username/password for private accounts'
-            },
-            'twitter': {
-                'primary': 'bearer_token',
-                'alternative': 'credentials',
-                'description': 'Use API token or login credentials'
-            }
-        }
-        
-        return recommendations.get(platform, {
-            'primary': 'credentials',
-            'alternative': 'manual',
-            'description': 'Manual authentication required'
-        })
+        # A copy, so callers get a plain, serializable dict they are free to modify
+        return dict(_AUTH_RECOMMENDATIONS.get(platform, _DEFAULT_AUTH_RECOMMENDATION))
         
     def prepare_download_environment(self, platform: str, auth_method: str = None) -> bool:
         """Prepare download environment with necessary authentication."""
@@ -151,18 +198,18 @@ class EnhancedDownloader:
     def _verify_stored_credentials(self, platform: str) -> bool:
         """Verify that credentials are stored for the platform."""
         try:
-            from utils.auth_manager import AuthManager
-            auth_manager = AuthManager(self.config_manager)
-            
-            credentials = auth_manager.get_credentials(platform)
+            credentials = self._get_auth_manager().get_credentials(platform)
             return credentials is not None and 'username' in credentials and 'password' in credentials
             
         except Exception as e:
             logging.error(f"Credential verification failed: {e}")
             return False
             
-    def validate_download_capability(self, url: str) -> Dict[str, Any]:
-        """Validate if the URL can be downloaded with current setup."""
+    def validate_download_capability(self, url: str, auth_cache: Optional[Dict[str, bool]] = None) -> Dict[str, Any]:
+        """Validate if the URL can be downloaded with current setup.
+        
+        auth_cache, if given, memoizes the per-platform authentication check across calls.
+        """
         try:
             # Detect content
             content_info = self.detect_content_type(url)
@@ -179,7 +226,11 @@ class EnhancedDownloader:
             
             # Check authentication status
             if requires_auth:
-                auth_ready = self.prepare_download_environment(platform)
+                auth_ready = auth_cache.get(platform) if auth_cache is not None else None
+                if auth_ready is None:
+                    auth_ready = self.prepare_download_environment(platform)
+                    if auth_cache is not None:
+                        auth_cache[platform] = auth_ready
                 if not auth_ready:
                     auth_method = self.get_recommended_auth_method(platform, content_info.get('content_type', ''))
                     return {
@@ -205,8 +256,9 @@ class EnhancedDownloader:
                 'recommendations': ['Check URL format and try again']
             }
 
-    def batch_process_urls(self, urls: List[str], options: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Process multiple URLs in batch with optimized performance."""
+    async def batch_process_urls(self, urls: List[str], options: Dict[str, Any] = None,
+                                 max_concurrent: int = 32) -> Dict[str, Any]:
+        """Process multiple URLs in batch, validating up to max_concurrent at once."""
         try:
             results = {
                 'successful': [],
@@ -217,30 +269,36 @@ class EnhancedDownloader:
             
             start_time = time.time()
             
+            # Validate each distinct URL once and check auth once per platform
+            auth_cache = {}
+            semaphore = asyncio.Semaphore(max_concurrent)
+            
+            async def validate(url):
+                async with semaphore:
+                    # Validation may read the credential store, so keep it off the event loop
+                    return await asyncio.to_thread(self.validate_download_capability, url, auth_cache)
+                    
+            unique_urls = list(dict.fromkeys(urls))
+            outcomes = await asyncio.gather(*(validate(url) for url in unique_urls), return_exceptions=True)
+            validations = dict(zip(unique_urls, outcomes))
+            
             for url in urls:
                 try:
-                    # Validate each URL
-                    validation = self.validate_download_capability(url)
+                    validation = validations[url]
+                    if isinstance(validation, BaseException):
+                        raise validation
                     
                     if validation['can_download']:
-                        results['successful'].append({
-                            'url': url,
-                            'platform': validation['content_info']['platform'],
-                            'status': 'ready'
-                        })
+                        results['successful'].append(BatchSuccess(url, validation['content_info']['platform']))
                     else:
-                        results['failed'].append({
-                            'url': url,
-                            'reason': validation['reason'],
-                            'recommendations': validation.get('recommendations', [])
-                        })
+                        results['failed'].append(BatchFailure(
+                            url, validation['reason'], tuple(validation.get('recommendations', ()))
+                        ))
                         
                 except Exception as e:
-                    results['failed'].append({
-                        'url': url,
-                        'reason': f'Validation error: {str(e)}',
-                        'recommendations': ['Check URL format']
-                    })
+                    results['failed'].append(BatchFailure(
+                        url, f'Validation error: {str(e)}', ('Check URL format',)
+                    ))
                     
             results['processing_time'] = time.time() - start_time
             
@@ -250,25 +308,33 @@ class EnhancedDownloader:
             logging.error(f"Batch processing failed: {e}")
             return {'error': str(e)}
             
-    def smart_retry_mechanism(self, download_func, max_retries: int = 5) -> Dict[str, Any]:
-        """Intelligent retry mechanism with exponential backoff."""
+    def smart_retry_mechanism(self, download_func, max_retries: int = 5,
+                              max_backoff: float = 30.0) -> Dict[str, Any]:
+        """Intelligent retry mechanism with capped, fully jittered exponential backoff."""
         for attempt in range(max_retries):
             try:
                 result = download_func()
                 if result.get('success', False):
                     return result
                     
-                # Exponential backoff
-                wait_time = 2 ** attempt
-                logging.warning(f"Retry attempt {attempt + 1}/{max_retries} in {wait_time}s")
+                # Missing, private or unauthorized content will fail the same way again
+                if _NON_RETRYABLE_RE.search(str(result.get('error', ''))):
+                    return result
+                    
+                if attempt == max_retries - 1:
+                    break
+                    
+                # Jittered backoff keeps parallel retries from hitting the platform in lockstep
+                wait_time = random.uniform(0, min(2 ** attempt, max_backoff))
+                logging.warning(f"Retry attempt {attempt + 1}/{max_retries} in {wait_time:.1f}s")
                 time.sleep(wait_time)
                 
             except Exception as e:
                 if attempt == max_retries - 1:
                     return {'success': False, 'error': f'Max retries reached: {str(e)}'}
                     
-                wait_time = 2 ** attempt
-                logging.warning(f"Error on attempt {attempt + 1}: {e}. Retrying in {wait_time}s")
+                wait_time = random.uniform(0, min(2 ** attempt, max_backoff))
+                logging.warning(f"Error on attempt {attempt + 1}: {e}. Retrying in {wait_time:.1f}s")
                 time.sleep(wait_time)
                 
         return {'success': False, 'error': 'Max retries exceeded'}
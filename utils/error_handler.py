@@ -3,15 +3,41 @@
 Comprehensive error handling and recovery system.
 """
 
+import atexit
+import heapq
 import logging
+import threading
 import traceback
 import time
 import os
 import json
+import weakref
+from collections import Counter, OrderedDict, deque
+from itertools import islice
 from typing import Dict, Any, Optional, Callable, List
 from enum import Enum
 from functools import wraps
 
+from utils import json_backend
+
+logger = logging.getLogger(__name__)
+
+# Error history is flushed to disk after this many new errors or this many
+# seconds since the last flush, whichever comes first, and once more at exit
+_FLUSH_EVERY = 50
+_FLUSH_INTERVAL = 5.0
+
+# Individual errors are appended to a JSON-Lines file; the newest are reloaded
+# by reading it backwards in blocks, and it is rotated once it gets large
+_RECENT_ERRORS = 100
+_TAIL_BLOCK = 64 * 1024
+_MAX_ERRORS_FILE_SIZE = 10 * 1024 * 1024
+
+# Repeats of an error within this many seconds of it being handled are only
+# counted, for up to this many distinct recent errors
+_COALESCE_WINDOW = 1.0
+_MAX_RECENT_SIGNATURES = 128
+
 class ErrorSeverity(Enum):
     """Error severity levels."""
     LOW = "low"
@@ -34,54 +60,217 @@ class ErrorCategory(Enum):
     RATE_LIMIT = "rate_limit"
     CONTENT_PROTECTION = "content_protection"
 
+# Severities whose tracebacks are always recorded; others only when debugging
+_TRACEBACK_SEVERITIES = frozenset({ErrorSeverity.HIGH, ErrorSeverity.CRITICAL})
+
+# Log level each error severity is reported at
+_SEVERITY_LEVELS = {
+    ErrorSeverity.CRITICAL.value: logging.CRITICAL,
+    ErrorSeverity.HIGH.value: logging.ERROR,
+    ErrorSeverity.MEDIUM.value: logging.WARNING,
+    ErrorSeverity.LOW.value: logging.INFO
+}
+
+class _JsonlWriter:
+    """Appends complete lines to one JSON-Lines file for every ErrorHandler in the process.
+    
+    Each record goes out as one line-buffered write under a lock, so handlers
+    never interleave partial lines, and rotation happens on the only open handle.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fh = None
+        
+    def _open(self, mode: str):
+        """Open the file line-buffered, so every record is written as it is added."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fh = open(self.path, mode, encoding='utf-8', buffering=1)
+        
+    def write_line(self, line: str):
+        """Append one line, rotating the file once it grows too large."""
+        with self._lock:
+            if self._fh is None:
+                self._open('a')
+            self._fh.write(line)
+            
+            if self._fh.tell() > _MAX_ERRORS_FILE_SIZE:
+                self._fh.close()
+                os.replace(self.path, self.path + '.1')
+                self._open('a')
+                
+    def truncate(self):
+        """Empty the file."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+            self._open('w')
+            
+    def close(self):
+        """Close the file; the next line reopens it."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+                
+# Shared writers by file path, and the live handlers whose history is saved at exit
+_jsonl_writers: Dict[str, _JsonlWriter] = {}
+_jsonl_writers_lock = threading.Lock()
+_live_handlers = weakref.WeakSet()
+
+def _get_jsonl_writer(path: str) -> _JsonlWriter:
+    """Get the process-wide writer for a JSON-Lines error log."""
+    with _jsonl_writers_lock:
+        writer = _jsonl_writers.get(path)
+        if writer is None:
+            writer = _jsonl_writers[path] = _JsonlWriter(path)
+        return writer
+        
+def _flush_at_exit():
+    """Save the history of every live ErrorHandler and close the shared error logs."""
+    for handler in list(_live_handlers):
+        handler.flush_error_history()
+    for writer in list(_jsonl_writers.values()):
+        writer.close()
+        
+atexit.register(_flush_at_exit)
+
+def _tally(counts, key: str):
+    """Count key in per-type counts.
+    
+    Most error types only ever see one category and one severity, so counts start
+    as a (key, count) pair and become a dict once a second key appears. Pairs read
+    back from JSON are lists, which are handled the same way.
+    """
+    if isinstance(counts, dict):
+        counts[key] = counts.get(key, 0) + 1
+        return counts
+    if counts[0] == key:
+        return (key, counts[1] + 1)
+    return {counts[0]: counts[1], key: 1}
+
+def _tally_items(counts):
+    """(key, count) items of counts kept by _tally."""
+    return counts.items() if isinstance(counts, dict) else (counts,)
+
 class ErrorHandler:
     """Comprehensive error handling and recovery system."""
     
     def __init__(self, config_manager):
         self.config_manager = config_manager
-        self.config = config_manager.get_config()
+        self.config = config_manager.config
         
-        # Error tracking
-        self.error_log = []
+        # Error tracking; only the newest errors are kept in memory
+        self.error_log = deque(maxlen=_RECENT_ERRORS)
         self.error_stats = {}
         self.recovery_attempts = {}
         
-        # Error log file
+        # (type, message, category, severity) -> (monotonic time handled, error info)
+        self._recent_sigs = OrderedDict()
+        
+        # Error statistics file and append-only per-error log
         self.error_log_file = os.path.expanduser(
             "~/.social_media_downloader/logs/error_analysis.json"
         )
+        self.errors_jsonl_file = os.path.expanduser(
+            "~/.social_media_downloader/logs/errors.jsonl"
+        )
         
         # Load previous error data
         self._load_error_history()
         
+        self._jsonl_writer = _get_jsonl_writer(self.errors_jsonl_file)
+        
+        # Errors recorded since the last write of the history file
+        self._dirty_count = 0
+        self._last_flush = time.monotonic()
+        
+        # Saved at exit without atexit holding a reference to every handler
+        _live_handlers.add(self)
+        
     def _load_error_history(self):
         """Load previous error history for analysis."""
         try:
             if os.path.exists(self.error_log_file):
-                with open(self.error_log_file, 'r') as f:
-                    data = json.load(f)
+                with open(self.error_log_file, 'rb') as f:
+                    data = json_backend.loads(f.read())
                     self.error_stats = data.get('stats', {})
-                    self.error_log = data.get('recent_errors', [])[-100:]  # Keep last 100
+                    # Older versions kept recent errors in the stats file itself
+                    self.error_log.extend(data.get('recent_errors', []))
+                    
+            if os.path.exists(self.errors_jsonl_file):
+                self.error_log.clear()
+                self.error_log.extend(self._read_recent_errors())
         except Exception as e:
             logging.warning(f"Could not load error history: {e}")
             
+    def _read_recent_errors(self) -> List[Dict[str, Any]]:
+        """Read the newest errors from the end of the JSON-Lines log."""
+        with open(self.errors_jsonl_file, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            data = b''
+            # Read backwards until enough complete lines are buffered
+            while position > 0 and data.count(b'\n') <= _RECENT_ERRORS:
+                block = min(_TAIL_BLOCK, position)
+                position -= block
+                f.seek(position)
+                data = f.read(block) + data
+                
+        lines = data.splitlines()
+        if position > 0:
+            lines = lines[1:]  # The first line may be cut off
+            
+        recent = []
+        for line in lines[-_RECENT_ERRORS:]:
+            try:
+                recent.append(json.loads(line))
+            except ValueError:
+                continue  # Skip a partially written line
+        return recent
+        
+    def _append_error(self, error_info: Dict[str, Any]):
+        """Append one error to the JSON-Lines log, rotating it when it grows too large."""
+        try:
+            self._jsonl_writer.write_line(json.dumps(error_info, separators=(',', ':'), default=str) + '\n')
+        except Exception as e:
+            logging.error(f"Could not append to error log: {e}")
+            
     def _save_error_history(self):
         """Save error history to file."""
         try:
             os.makedirs(os.path.dirname(self.error_log_file), exist_ok=True)
             
+            # Individual errors live in the line-buffered JSON-Lines log
             data = {
                 'stats': self.error_stats,
-                'recent_errors': self.error_log[-100:],  # Keep last 100
                 'last_updated': time.time()
             }
             
-            with open(self.error_log_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            # Write beside the target and rename over it so a crash never truncates the history
+            tmp_file = self.error_log_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(json_backend.dumps(data))
+            os.replace(tmp_file, self.error_log_file)
+            
+            self._dirty_count = 0
+            self._last_flush = time.monotonic()
                 
         except Exception as e:
             logging.error(f"Could not save error history: {e}")
             
+    def _maybe_flush(self):
+        """Save error history once enough errors or time have accumulated."""
+        self._dirty_count += 1
+        if (self._dirty_count >= _FLUSH_EVERY
+                or time.monotonic() - self._last_flush > _FLUSH_INTERVAL):
+            self._save_error_history()
+            
+    def flush_error_history(self):
+        """Write any error history not yet saved to disk."""
+        if self._dirty_count:
+            self._save_error_history()
+            
     def handle_error(self, error: Exception, context: Dict[str, Any] = None, 
                     category: ErrorCategory = ErrorCategory.SYSTEM,
                     severity: ErrorSeverity = ErrorSeverity.MEDIUM,
@@ -100,6 +289,19 @@ class ErrorHandler:
             Dict with error info and recovery status
         """
         try:
+            # Error storms repeat the same failure; count repeats instead of re-handling them
+            signature = (type(error).__name__, str(error)[:64], category, severity)
+            if recovery_action is None:
+                repeated = self._coalesce_repeat(signature)
+                if repeated is not None:
+                    return repeated
+                    
+            # Formatting a traceback is costly and rarely needed for minor errors
+            if severity in _TRACEBACK_SEVERITIES or logger.isEnabledFor(logging.DEBUG):
+                error_traceback = traceback.format_exc()
+            else:
+                error_traceback = None
+                
             error_info = {
                 'timestamp': time.time(),
                 'error_type': type(error).__name__,
@@ -107,7 +309,7 @@ class ErrorHandler:
                 'category': category.value,
                 'severity': severity.value,
                 'context': context or {},
-                'traceback': traceback.format_exc(),
+                'traceback': error_traceback,
                 'recovery_attempted': False,
                 'recovery_successful': False
             }
@@ -116,7 +318,8 @@ class ErrorHandler:
             self._log_error(error_info)
             
             # Update statistics
-            self._update_error_stats(error_info)
+            self._update_error_stats(error_info['error_type'], error_info['category'],
+                                     error_info['severity'], error_info['timestamp'])
             
             # Attempt recovery if provided
             if recovery_action:
@@ -130,9 +333,15 @@ class ErrorHandler:
                     error_info['recovery_error'] = str(recovery_error)
                     logging.error(f"Recovery action failed: {recovery_error}")
                     
-            # Save error history
-            self._save_error_history()
+            # Persist the error, then the stats (batched; see _maybe_flush)
+            self._append_error(error_info)
+            self._maybe_flush()
             
+            self._recent_sigs[signature] = (time.monotonic(), error_info)
+            self._recent_sigs.move_to_end(signature)
+            if len(self._recent_sigs) > _MAX_RECENT_SIGNATURES:
+                self._recent_sigs.popitem(last=False)
+                
             return error_info
             
         except Exception as handler_error:
@@ -145,51 +354,47 @@ class ErrorHandler:
             
     def _log_error(self, error_info: Dict[str, Any]):
         """Log error with appropriate level."""
-        severity = error_info['severity']
-        message = f"[{error_info['category'].upper()}] {error_info['error_type']}: {error_info['error_message']}"
+        level = _SEVERITY_LEVELS.get(error_info['severity'], logging.INFO)
         
-        if severity == ErrorSeverity.CRITICAL.value:
-            logging.critical(message)
-        elif severity == ErrorSeverity.HIGH.value:
-            logging.error(message)
-        elif severity == ErrorSeverity.MEDIUM.value:
-            logging.warning(message)
-        else:
-            logging.info(message)
+        # Only format the message if it will actually be emitted
+        if logger.isEnabledFor(level):
+            logger.log(level, f"[{error_info['category'].upper()}] {error_info['error_type']}: {error_info['error_message']}")
             
         # Add to error log
         self.error_log.append(error_info)
         
-    def _update_error_stats(self, error_info: Dict[str, Any]):
-        """Update error statistics."""
-        error_type = error_info['error_type']
-        category = error_info['category']
-        severity = error_info['severity']
+    def _coalesce_repeat(self, signature: tuple) -> Optional[Dict[str, Any]]:
+        """Count a repeat of a just-handled error, returning its info, or None if it must be handled."""
+        recent = self._recent_sigs.get(signature)
+        if recent is None or time.monotonic() - recent[0] >= _COALESCE_WINDOW:
+            return None
+            
+        self._recent_sigs.move_to_end(signature)
+        error_type, _, category, severity = signature
+        self._update_error_stats(error_type, category.value, severity.value, time.time())
+        self._maybe_flush()
+        return recent[1]
         
+    def _update_error_stats(self, error_type: str, category: str, severity: str, timestamp: float):
+        """Update error statistics."""
         # Initialize stats if needed
         if error_type not in self.error_stats:
             self.error_stats[error_type] = {
                 'count': 0,
-                'categories': {},
-                'severities': {},
-                'first_seen': error_info['timestamp'],
-                'last_seen': error_info['timestamp']
+                'categories': (category, 0),
+                'severities': (severity, 0),
+                'first_seen': timestamp,
+                'last_seen': timestamp
             }
             
         # Update counts
         stats = self.error_stats[error_type]
         stats['count'] += 1
-        stats['last_seen'] = error_info['timestamp']
-        
-        # Update category stats
-        if category not in stats['categories']:
-            stats['categories'][category] = 0
-        stats['categories'][category] += 1
+        stats['last_seen'] = timestamp
         
-        # Update severity stats
-        if severity not in stats['severities']:
-            stats['severities'][severity] = 0
-        stats['severities'][severity] += 1
+        # Update category and severity stats
+        stats['categories'] = _tally(stats['categories'], category)
+        stats['severities'] = _tally(stats['severities'], severity)
         
     def with_error_handling(self, category: ErrorCategory = ErrorCategory.SYSTEM,
                            severity: ErrorSeverity = ErrorSeverity.MEDIUM,
@@ -274,30 +479,26 @@ class ErrorHandler:
         
     def get_error_stats(self) -> Dict[str, Any]:
         """Get comprehensive error statistics."""
-        total_errors = sum(stats['count'] for stats in self.error_stats.values())
-        
-        most_common = sorted(
-            self.error_stats.items(),
-            key=lambda x: x[1]['count'],
-            reverse=True
-        )[:10]
+        total_errors = 0
+        category_stats = Counter()
+        severity_stats = Counter()
         
-        category_stats = {}
-        severity_stats = {}
+        for stats in self.error_stats.values():
+            total_errors += stats['count']
+            for category, count in _tally_items(stats['categories']):
+                category_stats[category] += count
+            for severity, count in _tally_items(stats['severities']):
+                severity_stats[severity] += count
+            
+        # Only the top ten are needed, so skip sorting every error type
+        most_common = heapq.nlargest(10, self.error_stats.items(), key=lambda x: x[1]['count'])
         
-        for error_type, stats in self.error_stats.items():
-            for category, count in stats['categories'].items():
-                category_stats[category] = category_stats.get(category, 0) + count
-                
-            for severity, count in stats['severities'].items():
-                severity_stats[severity] = severity_stats.get(severity, 0) + count
-                
         return {
             'total_errors': total_errors,
             'unique_error_types': len(self.error_stats),
             'most_common_errors': most_common,
-            'category_breakdown': category_stats,
-            'severity_breakdown': severity_stats,
+            'category_breakdown': dict(category_stats),
+            'severity_breakdown': dict(severity_stats),
             'recent_error_count': len(self.error_log),
             'error_rate_trend': self._calculate_error_trend()
         }
@@ -305,13 +506,14 @@ class ErrorHandler:
     def _calculate_error_trend(self) -> Dict[str, Any]:
         """Calculate error rate trends."""
         try:
-            recent_errors = [e for e in self.error_log if e['timestamp'] > time.time() - 3600]  # Last hour
-            older_errors = [e for e in self.error_log if e['timestamp'] <= time.time() - 3600]
+            cutoff = time.time() - 3600  # Last hour
+            recent_count = sum(1 for e in self.error_log if e['timestamp'] > cutoff)
+            older_count = len(self.error_log) - recent_count
             
             return {
-                'last_hour': len(recent_errors),
-                'previous_period': len(older_errors),
-                'trend': 'increasing' if len(recent_errors) > len(older_errors) else 'decreasing'
+                'last_hour': recent_count,
+                'previous_period': older_count,
+                'trend': 'increasing' if recent_count > older_count else 'decreasing'
             }
         except:
             return {'trend': 'unknown'}
@@ -320,6 +522,13 @@ class ErrorHandler:
         """Clear error history."""
         self.error_log.clear()
         self.error_stats.clear()
+        self._recent_sigs.clear()
+        
+        try:
+            self._jsonl_writer.truncate()
+        except OSError as e:
+            logging.error(f"Could not clear error log: {e}")
+            
         self._save_error_history()
         logging.info("Error history cleared")
         
@@ -329,12 +538,13 @@ class ErrorHandler:
             report = {
                 'generated_at': time.time(),
                 'statistics': self.get_error_stats(),
-                'detailed_errors': self.error_log,
+                'detailed_errors': list(self.error_log),
                 'error_patterns': self._analyze_error_patterns()
             }
             
-            with open(filepath, 'w') as f:
-                json.dump(report, f, indent=2)
+            # Recovery results can be arbitrary objects; fall back to their str()
+            with open(filepath, 'wb') as f:
+                f.write(json_backend.dumps(report, default=str))
                 
             logging.info(f"Error report exported to {filepath}")
             
@@ -351,9 +561,7 @@ class ErrorHandler:
         
         try:
             # Find recurring error sequences
-            for i, error in enumerate(self.error_log[:-1]):
-                next_error = self.error_log[i + 1]
-                
+            for error, next_error in zip(self.error_log, islice(self.error_log, 1, None)):
                 sequence = f"{error['error_type']} -> {next_error['error_type']}"
                 patterns['recurring_errors'][sequence] = patterns['recurring_errors'].get(sequence, 0) + 1
                 
@@ -2,19 +2,94 @@
 File management utilities.
 """
 
+import errno
+import functools
 import os
 import shutil
 import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import re
+from collections import defaultdict
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from operator import itemgetter
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# Hash constructors by algorithm name; blake2b and xxh3_128 are for fast,
+# non-cryptographic content comparison
+_HASH_CONSTRUCTORS = {
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+    'blake2b': functools.partial(hashlib.blake2b, digest_size=16)
+}
+if XXHASH_AVAILABLE:
+    _HASH_CONSTRUCTORS['xxh3_128'] = xxhash.xxh3_128
+
+# Fastest available algorithm for finding duplicate files
+_DEDUP_ALGORITHM = 'xxh3_128' if XXHASH_AVAILABLE else 'blake2b'
+
+# Filename sanitization: unsafe characters become '_', control characters are
+# dropped, and runs of whitespace collapse to one space
+_UNSAFE_TRANS = str.maketrans({**{c: '_' for c in '<>:"/\\|?*'}, **{c: None for c in range(32)}})
+_WS_RE = re.compile(r'\s+')
+
+# Bytes hashed from the start of same-sized files before hashing them in full
+_PREFIX_HASH_BYTES = 64 * 1024
+
+# hashlib releases the GIL while hashing, so hashing threads overlap their reads
+_HASH_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+def _iter_files(directory: str) -> Iterator[os.DirEntry]:
+    """Recursively yield directory entries for the files under a directory."""
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path)
+            elif entry.is_file():
+                yield entry
+
+def _prefix_hash(filepath: str) -> bytes:
+    """Hash the first _PREFIX_HASH_BYTES of a file."""
+    with open(filepath, 'rb') as f:
+        return hashlib.blake2b(f.read(_PREFIX_HASH_BYTES), digest_size=16).digest()
+
+def _group_by(executor: Executor, paths: Iterable[str], key) -> Dict[Any, List[str]]:
+    """Group paths by key(path) computed on the executor, keeping groups of two or more.
+    
+    Paths that cannot be read, or whose key is empty, are dropped.
+    """
+    futures = {executor.submit(key, path): path for path in paths}
+    groups = defaultdict(list)
+    for future in as_completed(futures):
+        path = futures[future]
+        try:
+            group_key = future.result()
+        except OSError as e:
+            logging.warning(f"Could not read {path}: {e}")
+            continue
+        if group_key:
+            groups[group_key].append(path)
+    return {group_key: group for group_key, group in groups.items() if len(group) > 1}
 
 class FileManager:
     """Manages file operations and organization."""
     
     def __init__(self, config_manager):
         self.config_manager = config_manager
-        self.config = config_manager.get_config()
+        self.reload_config()
+        
+    def reload_config(self):
+        """Re-read configuration and the filename flags cached from it."""
+        self.config = self.config_manager.config
+        self._sanitize = bool(self.config.get('sanitize_filenames', True))
+        self._add_date = bool(self.config.get('add_date_to_filename', False))
         
     def organize_files(self, download_path: str, platform: str) -> Dict[str, Any]:
         """Organize downloaded files according to configuration."""
@@ -29,19 +104,25 @@ class FileManager:
             os.makedirs(platform_dir, exist_ok=True)
             
             # Get all files in download directory
-            for filename in os.listdir(download_path):
-                filepath = os.path.join(download_path, filename)
+            with os.scandir(download_path) as it:
+                entries = [entry for entry in it if entry.name != '.test_write' and entry.is_file()]
                 
-                if os.path.isfile(filepath) and filename != '.test_write':
-                    # Move file to platform directory
-                    new_filepath = os.path.join(platform_dir, filename)
-                    
+            for entry in entries:
+                # Move file to platform directory
+                new_filepath = os.path.join(platform_dir, entry.name)
+                
+                try:
                     try:
-                        shutil.move(filepath, new_filepath)
-                        organized_count += 1
-                    except Exception as e:
-                        logging.warning(f"Could not move file {filename}: {e}")
-                        
+                        # Same filesystem, so normally a single rename
+                        os.rename(entry.path, new_filepath)
+                    except OSError as e:
+                        if e.errno != errno.EXDEV:
+                            raise
+                        shutil.move(entry.path, new_filepath)
+                    organized_count += 1
+                except Exception as e:
+                    logging.warning(f"Could not move file {entry.name}: {e}")
+                    
             return {
                 'success': True,
                 'organized_count': organized_count,
@@ -54,20 +135,14 @@ class FileManager:
             
     def clean_filename(self, filename: str) -> str:
         """Clean and sanitize filename."""
-        if not self.config.get('sanitize_filenames', True):
+        if not self._sanitize:
             return filename
             
-        # Remove or replace unsafe characters
-        unsafe_chars = '<>:"/\\|?*'
-        for char in unsafe_chars:
-            filename = filename.replace(char, '_')
-            
-        # Remove control characters
-        filename = ''.join(char for char in filename if ord(char) >= 32)
+        # Replace unsafe characters and remove control characters
+        filename = filename.translate(_UNSAFE_TRANS)
         
         # Remove excessive whitespace and dots
-        filename = ' '.join(filename.split())
-        filename = filename.strip('. ')
+        filename = _WS_RE.sub(' ', filename).strip('. ')
         
         # Limit length
         if len(filename) > 200:
@@ -78,7 +153,7 @@ class FileManager:
         
     def add_date_to_filename(self, filename: str) -> str:
         """Add current date to filename if configured."""
-        if not self.config.get('add_date_to_filename', False):
+        if not self._add_date:
             return filename
             
         name, ext = os.path.splitext(filename)
@@ -94,31 +169,26 @@ class FileManager:
         directory = os.path.dirname(filepath)
         name, ext = os.path.splitext(os.path.basename(filepath))
         
-        counter = 1
-        while True:
-            new_filename = f"{name}_{counter}{ext}"
-            new_filepath = os.path.join(directory, new_filename)
+        # One directory listing instead of an exists() call per candidate
+        with os.scandir(directory or '.') as it:
+            existing = {entry.name for entry in it}
             
-            if not os.path.exists(new_filepath):
-                return new_filepath
-                
+        counter = 1
+        while f"{name}_{counter}{ext}" in existing:
             counter += 1
             
+        return os.path.join(directory, f"{name}_{counter}{ext}")
+            
     def calculate_file_hash(self, filepath: str, algorithm: str = 'md5') -> str:
         """Calculate hash of a file."""
         try:
-            if algorithm.lower() == 'md5':
-                hash_obj = hashlib.md5()
-            elif algorithm.lower() == 'sha1':
-                hash_obj = hashlib.sha1()
-            elif algorithm.lower() == 'sha256':
-                hash_obj = hashlib.sha256()
-            else:
+            constructor = _HASH_CONSTRUCTORS.get(algorithm.lower())
+            if constructor is None:
                 raise ValueError(f"Unsupported hash algorithm: {algorithm}")
                 
-            with open(filepath, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_obj.update(chunk)
+            # file_digest feeds the file to the C hasher in large blocks
+            with open(filepath, 'rb', buffering=0) as f:
+                hash_obj = hashlib.file_digest(f, constructor)
                     
             return hash_obj.hexdigest()
             
@@ -126,29 +196,42 @@ class FileManager:
             logging.error(f"Error calculating file hash: {e}")
             return ""
             
-    def find_duplicates(self, directory: str) -> Dict[str, List[str]]:
-        """Find duplicate files in directory based on file hash."""
+    def find_duplicates(self, directory: str) -> Dict[str, List[Tuple[str, float]]]:
+        """Find duplicate files in directory based on file hash.
+        
+        Files are compared by size first, then by a hash of their first 64 KiB,
+        and only files that still collide are hashed in full. Each duplicate is
+        returned as (path, modification time) from the scan.
+        """
         try:
-            file_hashes = {}
-            duplicates = {}
-            
-            for root, dirs, files in os.walk(directory):
-                for filename in files:
-                    filepath = os.path.join(root, filename)
+            size_buckets = defaultdict(list)
+            for entry in _iter_files(directory):
+                try:
+                    stat = entry.stat()
+                    size_buckets[stat.st_size].append((entry.path, stat.st_mtime))
+                except OSError as e:
+                    logging.warning(f"Could not stat {entry.path}: {e}")
                     
-                    if os.path.isfile(filepath):
-                        file_hash = self.calculate_file_hash(filepath)
-                        
-                        if file_hash:
-                            if file_hash in file_hashes:
-                                # Duplicate found
-                                if file_hash not in duplicates:
-                                    duplicates[file_hash] = [file_hashes[file_hash]]
-                                duplicates[file_hash].append(filepath)
-                            else:
-                                file_hashes[file_hash] = filepath
-                                
-            return duplicates
+            # A file with a unique size cannot have a duplicate
+            candidates = {
+                path: (size, mtime)
+                for size, files in size_buckets.items() if len(files) > 1
+                for path, mtime in files
+            }
+            
+            with ThreadPoolExecutor(max_workers=_HASH_WORKERS) as executor:
+                same_prefix = _group_by(
+                    executor, candidates, lambda path: (candidates[path][0], _prefix_hash(path))
+                )
+                same_hash = _group_by(
+                    executor, [path for paths in same_prefix.values() for path in paths],
+                    functools.partial(self.calculate_file_hash, algorithm=_DEDUP_ALGORITHM)
+                )
+                
+            return {
+                file_hash: [(path, candidates[path][1]) for path in paths]
+                for file_hash, paths in same_hash.items()
+            }
             
         except Exception as e:
             logging.error(f"Error finding duplicates: {e}")
@@ -164,11 +247,11 @@ class FileManager:
                 if len(file_list) <= 1:
                     continue
                     
-                # Sort by modification time
-                file_list.sort(key=lambda x: os.path.getmtime(x), reverse=keep_newest)
+                # Sort by the modification time recorded by find_duplicates
+                file_list.sort(key=itemgetter(1), reverse=keep_newest)
                 
                 # Remove all but the first file (newest if keep_newest=True)
-                for filepath in file_list[1:]:
+                for filepath, _ in file_list[1:]:
                     try:
                         os.remove(filepath)
                         removed_count += 1
@@ -189,37 +272,39 @@ class FileManager:
     def get_directory_size(self, directory: str) -> int:
         """Get total size of directory in bytes."""
         try:
-            total_size = 0
-            
-            for root, dirs, files in os.walk(directory):
-                for filename in files:
-                    filepath = os.path.join(root, filename)
-                    if os.path.isfile(filepath):
-                        total_size += os.path.getsize(filepath)
-                        
-            return total_size
+            # DirEntry caches the type from the listing, so each file costs one stat()
+            return sum(entry.stat().st_size for entry in _iter_files(directory))
             
         except Exception as e:
             logging.error(f"Error calculating directory size: {e}")
             return 0
             
-    def get_file_info(self, filepath: str) -> Dict[str, Any]:
-        """Get detailed information about a file."""
+    def get_file_info(self, filepath: str, include_hash: bool = False) -> Dict[str, Any]:
+        """Get detailed information about a file.
+        
+        Hashing reads the whole file, so 'hash_md5' and 'hash' are only included
+        when include_hash is True.
+        """
         try:
             if not os.path.exists(filepath):
                 return {'error': 'File not found'}
                 
             stat = os.stat(filepath)
             
-            return {
+            info = {
                 'path': filepath,
                 'size': stat.st_size,
                 'created': datetime.fromtimestamp(stat.st_ctime),
                 'modified': datetime.fromtimestamp(stat.st_mtime),
-                'hash_md5': self.calculate_file_hash(filepath, 'md5'),
                 'extension': os.path.splitext(filepath)[1].lower()
             }
             
+            if include_hash:
+                info['hash_md5'] = self.calculate_file_hash(filepath, 'md5')
+                info['hash'] = self.calculate_file_hash(filepath, _DEDUP_ALGORITHM)
+                
+            return info
+            
         except Exception as e:
             logging.error(f"Error getting file info: {e}")
             return {'error': str(e)}
@@ -248,8 +333,12 @@ class FileManager:
             logging.error(f"Error cleaning up empty directories: {e}")
             return 0
             
-    def create_backup(self, source_path: str, backup_dir: str) -> bool:
-        """Create backup of a file or directory."""
+    def create_backup(self, source_path: str, backup_dir: str, preserve_metadata: bool = True) -> bool:
+        """Create backup of a file or directory.
+        
+        With preserve_metadata=False, timestamps and other metadata are not copied,
+        which saves a stat and utime per file when backing up large directories.
+        """
         try:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             source_name = os.path.basename(source_path)
@@ -258,10 +347,13 @@ class FileManager:
             
             os.makedirs(backup_dir, exist_ok=True)
             
+            # shutil copies file contents in-kernel (sendfile) where the platform allows
+            copy_function = shutil.copy2 if preserve_metadata else shutil.copy
+            
             if os.path.isfile(source_path):
-                shutil.copy2(source_path, backup_path)
+                copy_function(source_path, backup_path)
             elif os.path.isdir(source_path):
-                shutil.copytree(source_path, backup_path)
+                shutil.copytree(source_path, backup_path, copy_function=copy_function)
             else:
                 return False
                 
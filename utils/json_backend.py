@@ -0,0 +1,29 @@
+"""
+JSON (de)serialization with an optional orjson fast path.
+"""
+
+import json
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+if ORJSON_AVAILABLE:
+    def loads(data):
+        """Parse JSON from bytes or str."""
+        return orjson.loads(data)
+
+    def dumps(obj, default=None) -> bytes:
+        """Serialize to indented UTF-8 JSON bytes; default converts unsupported objects."""
+        return orjson.dumps(obj, default=default, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+else:
+    def loads(data):
+        """Parse JSON from bytes or str."""
+        return json.loads(data)
+
+    def dumps(obj, default=None) -> bytes:
+        """Serialize to indented UTF-8 JSON bytes; default converts unsupported objects."""
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=default).encode('utf-8')
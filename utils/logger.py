@@ -2,11 +2,127 @@
 Logging configuration and utilities.
 """
 
+import atexit
+import functools
 import os
 import logging
 import logging.handlers
+import queue
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterator, Optional, Tuple
+
+# Log files are written through a buffer of this size; it is flushed for WARNING
+# and above, and otherwise at most this many seconds after a record is buffered
+_LOG_BUFFER_SIZE = 64 * 1024
+_LOG_FLUSH_INTERVAL = 1.0
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that batches writes instead of flushing after every record."""
+    
+    def __init__(self, *args, **kwargs):
+        self._defer_flush = False
+        self._last_flush = time.monotonic()
+        self._size = 0
+        self._pending = 0
+        self._rotatable = False
+        super().__init__(*args, **kwargs)
+        
+    def _open(self):
+        stream = open(self.baseFilename, self.mode, buffering=_LOG_BUFFER_SIZE,
+                      encoding=self.encoding, errors=self.errors)
+        # The size is tracked here because seek() or tell() on the stream would flush it
+        self._size = os.fstat(stream.fileno()).st_size
+        self._rotatable = os.path.isfile(self.baseFilename)  # Never rotate e.g. /dev/null
+        return stream
+        
+    def shouldRollover(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes <= 0 or not self._rotatable:
+            return False
+        self._pending = len(self.format(record)) + 1
+        return self._size + self._pending >= self.maxBytes
+        
+    def emit(self, record):
+        # StreamHandler.emit flushes after writing; let minor records stay buffered
+        self._defer_flush = (record.levelno < logging.WARNING
+                             and time.monotonic() - self._last_flush < _LOG_FLUSH_INTERVAL)
+        self._pending = 0
+        try:
+            super().emit(record)
+            self._size += self._pending
+        finally:
+            self._defer_flush = False
+            
+    def flush(self):
+        if not self._defer_flush:
+            super().flush()
+            self._last_flush = time.monotonic()
+
+class CachedLogRecord(logging.LogRecord):
+    """LogRecord that builds its message once however many handlers format it."""
+    
+    _message_cache = None
+    
+    def getMessage(self):
+        # Keyed on msg/args identity so records rewritten by QueueHandler.prepare recompute
+        cached = self._message_cache
+        if cached is not None and cached[0] is self.msg and cached[1] is self.args:
+            return cached[2]
+        message = super().getMessage()
+        self._message_cache = (self.msg, self.args, message)
+        return message
+
+class _FlushingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes its handlers whenever the queue goes idle."""
+    
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=_LOG_FLUSH_INTERVAL)
+            except queue.Empty:
+                if not block:
+                    raise
+                for handler in self.handlers:
+                    handler.flush()
+
+@functools.lru_cache(maxsize=64)
+def _platform_tag(platform: str) -> str:
+    """'[PLATFORM]' prefix used by the download log helpers."""
+    return f"[{platform.upper()}]"
+
+@functools.lru_cache(maxsize=1)
+def _system_info_lines() -> tuple:
+    """System description logged by log_system_info, gathered once per process."""
+    import platform
+    import sys
+    
+    return (
+        "System Information:",
+        f"  OS: {platform.system()} {platform.release()}",
+        f"  Python: {sys.version}",
+        f"  Platform: {platform.platform()}",
+        f"  Architecture: {platform.architecture()}"
+    )
+
+# Background thread that writes queued records to the real handlers; see setup_logging
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+def _stop_log_listener():
+    """Write out any queued records, then stop the listener and close its handlers."""
+    global _log_listener
+    if _log_listener is None:
+        return
+        
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        handler.close()
+    _log_listener = None
+
+atexit.register(_stop_log_listener)
 
 def setup_logging(log_level: str = "INFO", log_to_file: bool = True, 
                  max_file_size: int = 10 * 1024 * 1024, backup_count: int = 5) -> None:
@@ -19,17 +135,22 @@ def setup_logging(log_level: str = "INFO", log_to_file: bool = True,
         max_file_size: Maximum log file size in bytes before rotation
         backup_count: Number of backup log files to keep
     """
+    global _log_listener
+    
     try:
         # Create logs directory
         log_dir = os.path.expanduser("~/.social_media_downloader/logs")
         os.makedirs(log_dir, exist_ok=True)
         
+        logging.setLogRecordFactory(CachedLogRecord)
+        
         # Configure root logger
         root_logger = logging.getLogger()
         root_logger.setLevel(getattr(logging, log_level.upper(), logging.INFO))
         
         # Clear existing handlers
         root_logger.handlers.clear()
+        _stop_log_listener()
         
         # Create formatter
         formatter = logging.Formatter(
@@ -41,12 +162,12 @@ def setup_logging(log_level: str = "INFO", log_to_file: bool = True,
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(formatter)
-        root_logger.addHandler(console_handler)
+        handlers = [console_handler]
         
         if log_to_file:
             # File handler with rotation
             log_file = os.path.join(log_dir, 'social_media_downloader.log')
-            file_handler = logging.handlers.RotatingFileHandler(
+            file_handler = BufferedRotatingFileHandler(
                 log_file,
                 maxBytes=max_file_size,
                 backupCount=backup_count,
@@ -54,11 +175,11 @@ def setup_logging(log_level: str = "INFO", log_to_file: bool = True,
             )
             file_handler.setLevel(logging.DEBUG)
             file_handler.setFormatter(formatter)
-            root_logger.addHandler(file_handler)
+            handlers.append(file_handler)
             
             # Error log file handler
             error_log_file = os.path.join(log_dir, 'errors.log')
-            error_handler = logging.handlers.RotatingFileHandler(
+            error_handler = BufferedRotatingFileHandler(
                 error_log_file,
                 maxBytes=max_file_size,
                 backupCount=backup_count,
@@ -66,8 +187,14 @@ def setup_logging(log_level: str = "INFO", log_to_file: bool = True,
             )
             error_handler.setLevel(logging.ERROR)
             error_handler.setFormatter(formatter)
-            root_logger.addHandler(error_handler)
+            handlers.append(error_handler)
             
+        # Callers only enqueue records; a listener thread does the blocking writes
+        log_queue = queue.Queue(-1)
+        _log_listener = _FlushingQueueListener(log_queue, *handlers, respect_handler_level=True)
+        _log_listener.start()
+        root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        
         # Log startup message
         logging.info("=" * 60)
         logging.info("Social Media Downloader - Logging initialized")
@@ -107,7 +234,10 @@ def log_download_start(platform: str, url: str, logger: Optional[logging.Logger]
     if logger is None:
         logger = logging.getLogger(__name__)
         
-    logger.info(f"[{platform.upper()}] Starting download: {url}")
+    if not logger.isEnabledFor(logging.INFO):
+        return
+        
+    logger.info("%s Starting download: %s", _platform_tag(platform), url)
 
 def log_download_complete(platform: str, url: str, files_count: int, 
                          logger: Optional[logging.Logger] = None):
@@ -123,7 +253,10 @@ def log_download_complete(platform: str, url: str, files_count: int,
     if logger is None:
         logger = logging.getLogger(__name__)
         
-    logger.info(f"[{platform.upper()}] Download completed: {url} ({files_count} files)")
+    if not logger.isEnabledFor(logging.INFO):
+        return
+        
+    logger.info("%s Download completed: %s (%s files)", _platform_tag(platform), url, files_count)
 
 def log_download_error(platform: str, url: str, error: str, 
                       logger: Optional[logging.Logger] = None):
@@ -139,7 +272,10 @@ def log_download_error(platform: str, url: str, error: str,
     if logger is None:
         logger = logging.getLogger(__name__)
         
-    logger.error(f"[{platform.upper()}] Download failed: {url} - {error}")
+    if not logger.isEnabledFor(logging.ERROR):
+        return
+        
+    logger.error("%s Download failed: %s - %s", _platform_tag(platform), url, error)
 
 def log_progress(platform: str, url: str, progress: int, 
                 logger: Optional[logging.Logger] = None):
@@ -152,11 +288,14 @@ def log_progress(platform: str, url: str, progress: int,
         progress: Progress percentage (0-100)
         logger: Optional logger instance
     """
+    if progress % 25:  # Log every 25% to avoid spam
+        return
+        
     if logger is None:
         logger = logging.getLogger(__name__)
         
-    if progress % 25 == 0:  # Log every 25% to avoid spam
-        logger.info(f"[{platform.upper()}] Progress: {url} - {progress}%")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("%s Progress: %s - %s%%", _platform_tag(platform), url, progress)
 
 def log_system_info(logger: Optional[logging.Logger] = None):
     """
@@ -169,15 +308,9 @@ def log_system_info(logger: Optional[logging.Logger] = None):
         logger = logging.getLogger(__name__)
         
     try:
-        import platform
-        import sys
-        
-        logger.info("System Information:")
-        logger.info(f"  OS: {platform.system()} {platform.release()}")
-        logger.info(f"  Python: {sys.version}")
-        logger.info(f"  Platform: {platform.platform()}")
-        logger.info(f"  Architecture: {platform.architecture()}")
-        
+        for line in _system_info_lines():
+            logger.info(line)
+            
     except Exception as e:
         logger.warning(f"Could not log system info: {e}")
 
@@ -210,6 +343,10 @@ def log_configuration(config: dict, logger: Optional[logging.Logger] = None):
     except Exception as e:
         logger.warning(f"Could not log configuration: {e}")
 
+# Configured per-download loggers by name; the lock only guards their creation
+_download_loggers: Dict[str, logging.Logger] = {}
+_download_loggers_lock = threading.Lock()
+
 def setup_download_logger(download_id: str, platform: str) -> logging.Logger:
     """
     Setup a dedicated logger for a specific download.
@@ -221,8 +358,22 @@ def setup_download_logger(download_id: str, platform: str) -> logging.Logger:
     Returns:
         Logger instance for the download
     """
+    logger_name = f"download.{platform}.{download_id}"
+    logger = _download_loggers.get(logger_name)
+    if logger is not None:
+        return logger
+        
+    with _download_loggers_lock:
+        logger = _download_loggers.get(logger_name)
+        if logger is None:
+            logger = _create_download_logger(logger_name, download_id, platform)
+            if logger.name == logger_name:  # Not the fallback logger after a failure
+                _download_loggers[logger_name] = logger
+        return logger
+        
+def _create_download_logger(logger_name: str, download_id: str, platform: str) -> logging.Logger:
+    """Create and configure the logger behind setup_download_logger."""
     try:
-        logger_name = f"download.{platform}.{download_id}"
         logger = logging.getLogger(logger_name)
         
         # Don't add handlers if already configured
@@ -235,7 +386,8 @@ def setup_download_logger(download_id: str, platform: str) -> logging.Logger:
         
         log_file = os.path.join(log_dir, f"{platform}_{download_id}.log")
         
-        # File handler for this download
+        # File handler for this download; unbuffered, since no listener flushes it
+        # and the log is tailed for live progress
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
         file_handler.setLevel(logging.DEBUG)
         
@@ -257,6 +409,23 @@ def setup_download_logger(download_id: str, platform: str) -> logging.Logger:
         logging.error(f"Failed to setup download logger: {e}")
         return logging.getLogger(__name__)
 
+def _iter_log_files(log_dir: str) -> Iterator[Tuple[os.DirEntry, os.stat_result]]:
+    """Yield (entry, stat) for every .log file under log_dir, skipping unreadable ones."""
+    pending = deque([log_dir])
+    while pending:
+        try:
+            with os.scandir(pending.popleft()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.name.endswith('.log') and entry.is_file():
+                            yield entry, entry.stat()
+                    except OSError:
+                        pass  # Skip files that can't be accessed
+        except OSError:
+            pass
+
 def cleanup_old_logs(days_to_keep: int = 30):
     """
     Clean up old log files.
@@ -265,8 +434,6 @@ def cleanup_old_logs(days_to_keep: int = 30):
         days_to_keep: Number of days of logs to keep
     """
     try:
-        import time
-        
         log_dir = os.path.expanduser("~/.social_media_downloader/logs")
         if not os.path.exists(log_dir):
             return
@@ -276,19 +443,19 @@ def cleanup_old_logs(days_to_keep: int = 30):
         
         removed_count = 0
         
-        for root, dirs, files in os.walk(log_dir):
-            for filename in files:
-                if filename.endswith('.log'):
-                    filepath = os.path.join(root, filename)
-                    
-                    try:
-                        file_time = os.path.getmtime(filepath)
-                        if file_time < cutoff_time:
-                            os.remove(filepath)
-                            removed_count += 1
-                    except OSError:
-                        pass  # Skip files that can't be accessed
-                        
+        # Collect first so directories are not modified while they are being scanned
+        stale_files = [
+            entry.path for entry, file_stat in _iter_log_files(log_dir)
+            if file_stat.st_mtime < cutoff_time
+        ]
+        
+        for filepath in stale_files:
+            try:
+                os.unlink(filepath)
+                removed_count += 1
+            except OSError:
+                pass  # Skip files that can't be removed
+                
         if removed_count > 0:
             logging.info(f"Cleaned up {removed_count} old log files")
             
@@ -314,32 +481,27 @@ def get_log_stats() -> dict:
             'newest_log': None
         }
         
+        total_files = 0
+        total_size = 0
         oldest_time = None
         newest_time = None
         
-        for root, dirs, files in os.walk(log_dir):
-            for filename in files:
-                if filename.endswith('.log'):
-                    filepath = os.path.join(root, filename)
-                    
-                    try:
-                        file_stat = os.stat(filepath)
-                        stats['total_files'] += 1
-                        stats['total_size'] += file_stat.st_size
-                        
-                        file_time = file_stat.st_mtime
-                        
-                        if oldest_time is None or file_time < oldest_time:
-                            oldest_time = file_time
-                            stats['oldest_log'] = datetime.fromtimestamp(file_time)
-                            
-                        if newest_time is None or file_time > newest_time:
-                            newest_time = file_time
-                            stats['newest_log'] = datetime.fromtimestamp(file_time)
-                            
-                    except OSError:
-                        pass
-                        
+        for entry, file_stat in _iter_log_files(log_dir):
+            total_files += 1
+            total_size += file_stat.st_size
+            
+            file_time = file_stat.st_mtime
+            if oldest_time is None or file_time < oldest_time:
+                oldest_time = file_time
+            if newest_time is None or file_time > newest_time:
+                newest_time = file_time
+                
+        stats['total_files'] = total_files
+        stats['total_size'] = total_size
+        if oldest_time is not None:
+            stats['oldest_log'] = datetime.fromtimestamp(oldest_time)
+            stats['newest_log'] = datetime.fromtimestamp(newest_time)
+            
         return stats
         
     except Exception as e:
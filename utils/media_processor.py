@@ -3,20 +3,112 @@ Media processing utilities for video/audio manipulation.
 """
 
 import os
+import functools
 import logging
-from typing import List, Optional
+import threading
+from collections import OrderedDict, deque
+from typing import List, Optional, Tuple
 import subprocess
 import tempfile
 
+try:
+    import mutagen
+    MUTAGEN_AVAILABLE = True
+except ImportError:
+    MUTAGEN_AVAILABLE = False
+
+# Only the end of FFmpeg's stderr is kept, for error messages
+_STDERR_TAIL_LINES = 128
+
+# Escapes a path for a single-quoted entry in an FFmpeg concat list: a quote
+# closes the string, adds an escaped quote and reopens it; backslashes become '/'
+_FFMPEG_PATH_TRANS = str.maketrans({"'": "'\\''", "\\": "/"})
+
+# Audio durations remembered per MediaProcessor
+_AUDIO_DURATION_CACHE_SIZE = 256
+
+@functools.lru_cache(maxsize=1)
+def _ffmpeg_available() -> bool:
+    """Check once per process whether FFmpeg can be run."""
+    try:
+        result = subprocess.run(['ffmpeg', '-version'], 
+                              capture_output=True, text=True, timeout=10)
+        return result.returncode == 0
+    except (subprocess.SubprocessError, FileNotFoundError, subprocess.TimeoutExpired):
+        return False
+
+# Hardware H.264 encoders tried, in order, before falling back to libx264,
+# each with its extra encoder options
+_HW_VIDEO_ENCODERS = (
+    ('h264_nvenc', ('-preset', 'p4')),
+    ('h264_qsv', ()),
+    ('h264_videotoolbox', ())
+)
+_SOFTWARE_VIDEO_ENCODER = ('libx264', ())
+
+@functools.lru_cache(maxsize=1)
+def _video_encoder() -> Tuple[str, Tuple[str, ...]]:
+    """Pick the H.264 encoder once per process: the first working hardware one, else libx264."""
+    try:
+        result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
+                                capture_output=True, text=True, timeout=10)
+    except (subprocess.SubprocessError, OSError):
+        return _SOFTWARE_VIDEO_ENCODER
+        
+    for encoder, options in _HW_VIDEO_ENCODERS:
+        if encoder not in result.stdout:
+            continue
+            
+        # Builds often list encoders whose hardware is missing, so try a tiny encode
+        probe = [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', 'color=c=black:s=256x256:d=0.1',
+            '-c:v', encoder, *options,
+            '-pix_fmt', 'yuv420p',
+            '-f', 'null', '-'
+        ]
+        try:
+            if subprocess.run(probe, capture_output=True, timeout=30).returncode == 0:
+                logging.info(f"Using hardware video encoder: {encoder}")
+                return encoder, options
+        except (subprocess.SubprocessError, OSError):
+            continue
+            
+    return _SOFTWARE_VIDEO_ENCODER
+
+def _run_ffmpeg(cmd: List[str], timeout: float) -> Tuple[int, str]:
+    """Run an FFmpeg command, returning its exit code and the tail of its stderr."""
+    tail = deque(maxlen=_STDERR_TAIL_LINES)
+    with subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE) as proc:
+        # Drain stderr on a thread so the timeout still applies while FFmpeg is quiet
+        reader = threading.Thread(target=tail.extend, args=(proc.stderr,), daemon=True)
+        reader.start()
+        try:
+            returncode = proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            raise
+        finally:
+            reader.join()
+            
+    return returncode, b''.join(tail).decode('utf-8', 'replace')
+
 class MediaProcessor:
     """Handles media processing operations."""
     
     def __init__(self, config_manager):
         self.config_manager = config_manager
-        self.config = config_manager.get_config()
+        self.config = config_manager.config
+        
+        # Slideshow duration from config, used when the caller does not give one
+        self._default_slideshow_duration = self.config.get('tiktok', {}).get('slideshow_duration_per_image', 3.0)
+        
+        # LRU of audio durations keyed by (path, mtime_ns, size)
+        self._audio_duration_cache = OrderedDict()
         
     def create_slideshow_video(self, image_paths: List[str], audio_path: Optional[str], 
-                             output_path: str, duration_per_image: float = 3.0) -> bool:
+                             output_path: str, duration_per_image: Optional[float] = None) -> bool:
         """
         Create a video slideshow from images and audio.
         
@@ -25,6 +117,7 @@ class MediaProcessor:
             audio_path: Path to audio file (optional)
             output_path: Output video file path
             duration_per_image: Duration to show each image in seconds
+                (defaults to the configured slideshow duration)
             
         Returns:
             True if successful, False otherwise
@@ -39,8 +132,8 @@ class MediaProcessor:
                 logging.error("FFmpeg not found. Please install FFmpeg to process slideshows.")
                 return False
                 
-            # Get slideshow duration from config
-            duration_per_image = self.config.get('tiktok', {}).get('slideshow_duration_per_image', 3.0)
+            if duration_per_image is None:
+                duration_per_image = self._default_slideshow_duration
             
             # Create slideshow video
             if audio_path and os.path.exists(audio_path):
@@ -54,33 +147,67 @@ class MediaProcessor:
             
     def _check_ffmpeg(self) -> bool:
         """Check if FFmpeg is available."""
+        return _ffmpeg_available()
+            
+    def _write_concat_manifest(self, image_paths: List[str], duration_per_image: float) -> str:
+        """Write an FFmpeg concat-demuxer file list for a slideshow and return its path."""
+        # Build the file list in memory
+        lines = []
+        for image_path in image_paths:
+            # Escape path for FFmpeg
+            escaped_path = image_path.translate(_FFMPEG_PATH_TRANS)
+            lines.append(f"file '{escaped_path}'")
+            lines.append(f"duration {duration_per_image}")
+            
+        # Add the last image again for proper duration
+        if image_paths:
+            lines.append(lines[-2])
+            
+        # Write it to a temporary file in a single call
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.txt', delete=False) as f:
+            f.write(('\n'.join(lines) + '\n').encode('utf-8'))
+            return f.name
+            
+    def _link_image_sequence(self, image_paths: List[str], directory: str) -> Optional[str]:
+        """
+        Symlink images into directory as a numbered sequence.
+        
+        Returns:
+            FFmpeg input pattern for the sequence, or None if the images cannot be
+            read as one (mixed file types, or symlinks unavailable)
+        """
+        ext = os.path.splitext(image_paths[0])[1].lower()
+        if not ext or any(os.path.splitext(path)[1].lower() != ext for path in image_paths):
+            return None
+            
         try:
-            result = subprocess.run(['ffmpeg', '-version'], 
-                                  capture_output=True, text=True, timeout=10)
-            return result.returncode == 0
-        except (subprocess.SubprocessError, FileNotFoundError, subprocess.TimeoutExpired):
+            for index, image_path in enumerate(image_paths):
+                os.symlink(os.path.abspath(image_path), os.path.join(directory, f"img_{index:04d}{ext}"))
+        except (OSError, NotImplementedError):
+            return None
+            
+        return os.path.join(directory, f"img_%04d{ext}")
+        
+    def _run_slideshow_command(self, cmd: List[str], output_path: str) -> bool:
+        """Run an FFmpeg slideshow command and log the outcome."""
+        returncode, stderr = _run_ffmpeg(cmd, timeout=300)
+        
+        if returncode == 0:
+            logging.info(f"Successfully created slideshow video: {output_path}")
+            return True
+        else:
+            logging.error(f"FFmpeg error: {stderr}")
             return False
             
     def _create_slideshow_with_audio(self, image_paths: List[str], audio_path: str, 
                                    output_path: str, duration_per_image: float) -> bool:
         """Create slideshow video with audio."""
         try:
-            # Create a temporary file list for FFmpeg
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-                file_list_path = f.name
-                
-                for image_path in image_paths:
-                    # Escape path for FFmpeg
-                    escaped_path = image_path.replace("'", "\\'").replace("\\", "/")
-                    f.write(f"file '{escaped_path}'\n")
-                    f.write(f"duration {duration_per_image}\n")
-                    
-                # Add the last image again for proper duration
-                if image_paths:
-                    escaped_path = image_paths[-1].replace("'", "\\'").replace("\\", "/")
-                    f.write(f"file '{escaped_path}'\n")
-                    
+            file_list_path = self._write_concat_manifest(image_paths, duration_per_image)
+            
             try:
+                encoder, encoder_options = _video_encoder()
+                
                 # Get audio duration
                 audio_duration = self._get_audio_duration(audio_path)
                 if audio_duration <= 0:
@@ -93,7 +220,7 @@ class MediaProcessor:
                     '-safe', '0',
                     '-i', file_list_path,
                     '-i', audio_path,
-                    '-c:v', 'libx264',
+                    '-c:v', encoder, *encoder_options,
                     '-c:a', 'aac',
                     '-pix_fmt', 'yuv420p',
                     '-shortest',  # Stop when shortest input ends
@@ -101,20 +228,14 @@ class MediaProcessor:
                     output_path
                 ]
                 
-                # Execute FFmpeg command
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+                return self._run_slideshow_command(cmd, output_path)
                 
-                if result.returncode == 0:
-                    logging.info(f"Successfully created slideshow video: {output_path}")
-                    return True
-                else:
-                    logging.error(f"FFmpeg error: {result.stderr}")
-                    return False
-                    
             finally:
                 # Clean up temporary file
-                if os.path.exists(file_list_path):
+                try:
                     os.unlink(file_list_path)
+                except FileNotFoundError:
+                    pass
                     
         except Exception as e:
             logging.error(f"Error creating slideshow with audio: {e}")
@@ -124,21 +245,26 @@ class MediaProcessor:
                                       duration_per_image: float) -> bool:
         """Create slideshow video without audio."""
         try:
-            # Create a temporary file list for FFmpeg
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-                file_list_path = f.name
-                
-                for image_path in image_paths:
-                    # Escape path for FFmpeg
-                    escaped_path = image_path.replace("'", "\\'").replace("\\", "/")
-                    f.write(f"file '{escaped_path}'\n")
-                    f.write(f"duration {duration_per_image}\n")
-                    
-                # Add the last image again for proper duration
-                if image_paths:
-                    escaped_path = image_paths[-1].replace("'", "\\'").replace("\\", "/")
-                    f.write(f"file '{escaped_path}'\n")
+            encoder, encoder_options = _video_encoder()
+            
+            # Every slide lasts the same time, so when possible read them as one
+            # image sequence at 1/duration fps instead of through a concat list
+            with tempfile.TemporaryDirectory() as sequence_dir:
+                pattern = self._link_image_sequence(image_paths, sequence_dir)
+                if pattern is not None:
+                    cmd = [
+                        'ffmpeg',
+                        '-framerate', f'1/{duration_per_image}',
+                        '-i', pattern,
+                        '-c:v', encoder, *encoder_options,
+                        '-vf', 'fps=30,format=yuv420p',
+                        '-y',  # Overwrite output file
+                        output_path
+                    ]
+                    return self._run_slideshow_command(cmd, output_path)
                     
+            file_list_path = self._write_concat_manifest(image_paths, duration_per_image)
+            
             try:
                 # Build FFmpeg command
                 cmd = [
@@ -146,34 +272,58 @@ class MediaProcessor:
                     '-f', 'concat',
                     '-safe', '0',
                     '-i', file_list_path,
-                    '-c:v', 'libx264',
+                    '-c:v', encoder, *encoder_options,
                     '-pix_fmt', 'yuv420p',
                     '-r', '30',  # Frame rate
                     '-y',  # Overwrite output file
                     output_path
                 ]
                 
-                # Execute FFmpeg command
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+                return self._run_slideshow_command(cmd, output_path)
                 
-                if result.returncode == 0:
-                    logging.info(f"Successfully created slideshow video: {output_path}")
-                    return True
-                else:
-                    logging.error(f"FFmpeg error: {result.stderr}")
-                    return False
-                    
             finally:
                 # Clean up temporary file
-                if os.path.exists(file_list_path):
+                try:
                     os.unlink(file_list_path)
+                except FileNotFoundError:
+                    pass
                     
         except Exception as e:
             logging.error(f"Error creating slideshow without audio: {e}")
             return False
             
     def _get_audio_duration(self, audio_path: str) -> float:
-        """Get duration of audio file in seconds."""
+        """Get duration of audio file in seconds, cached while the file is unchanged."""
+        try:
+            stat = os.stat(audio_path)
+        except OSError as e:
+            logging.warning(f"Error getting audio duration: {e}")
+            return 0.0
+            
+        key = (audio_path, stat.st_mtime_ns, stat.st_size)
+        duration = self._audio_duration_cache.get(key)
+        if duration is not None:
+            self._audio_duration_cache.move_to_end(key)
+            return duration
+            
+        duration = self._probe_audio_duration(audio_path)
+        if duration > 0:  # Failures may be transient, so only cache real durations
+            self._audio_duration_cache[key] = duration
+            if len(self._audio_duration_cache) > _AUDIO_DURATION_CACHE_SIZE:
+                self._audio_duration_cache.popitem(last=False)
+        return duration
+        
+    def _probe_audio_duration(self, audio_path: str) -> float:
+        """Read the duration of an audio file in seconds."""
+        # Reading the duration from the file's headers avoids spawning ffprobe
+        if MUTAGEN_AVAILABLE:
+            try:
+                audio = mutagen.File(audio_path)
+                if audio is not None and audio.info.length > 0:
+                    return float(audio.info.length)
+            except Exception as e:
+                logging.debug(f"mutagen could not read {audio_path}: {e}")
+                
         try:
             cmd = [
                 'ffprobe',
@@ -210,13 +360,13 @@ class MediaProcessor:
                 output_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            returncode, stderr = _run_ffmpeg(cmd, timeout=120)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 logging.info(f"Successfully converted audio: {output_path}")
                 return True
             else:
-                logging.error(f"Audio conversion failed: {result.stderr}")
+                logging.error(f"Audio conversion failed: {stderr}")
                 return False
                 
         except Exception as e:
@@ -239,13 +389,13 @@ class MediaProcessor:
                 audio_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            returncode, stderr = _run_ffmpeg(cmd, timeout=120)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 logging.info(f"Successfully extracted audio: {audio_path}")
                 return True
             else:
-                logging.error(f"Audio extraction failed: {result.stderr}")
+                logging.error(f"Audio extraction failed: {stderr}")
                 return False
                 
         except Exception as e:
@@ -267,13 +417,13 @@ class MediaProcessor:
                 output_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+            returncode, stderr = _run_ffmpeg(cmd, timeout=60)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 logging.info(f"Successfully resized image: {output_path}")
                 return True
             else:
-                logging.error(f"Image resize failed: {result.stderr}")
+                logging.error(f"Image resize failed: {stderr}")
                 return False
                 
         except Exception as e:
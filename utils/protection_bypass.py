@@ -4,41 +4,256 @@ Comprehensive protection bypass system for Cloudflare, CAPTCHA, and other restri
 """
 
 import os
+import atexit
+import functools
 import logging
+import queue
+import threading
 import time
 import random
+import re
 import json
 import base64
-from typing import Dict, Any, Optional, List, Union
+import shutil
+import subprocess
+import sys
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterable, Iterator, Optional, List, Tuple
 from urllib.parse import urlparse, urljoin
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-import cloudscraper
-import undetected_chromedriver as uc
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, WebDriverException
-from seleniumwire import webdriver as wire_webdriver
-from fake_useragent import UserAgent
-from PIL import Image
-import cv2
-import numpy as np
-from Crypto.Cipher import AES
-from Crypto.Random import get_random_bytes
+
+# cloudscraper, undetected_chromedriver, selenium, seleniumwire, fake_useragent,
+# cv2 and numpy are imported where they are used, so importing this module
+# does not load a browser stack and OpenCV
+
+from utils import json_backend
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    from curl_cffi import requests as cffi_requests
+    CURL_CFFI_AVAILABLE = True
+except ImportError:
+    CURL_CFFI_AVAILABLE = False
+
+# Idle drivers kept per (headless, use_wire) configuration
+_DRIVER_POOL_SIZE = 4
+
+# Seconds a pooled driver may sit idle before it is quit instead of reused
+_DRIVER_IDLE_TIMEOUT = 300
+
+# Seconds before a cached session, with its cookies and challenge tokens, is rebuilt
+_SESSION_TTL = 1800
+
+# Browser whose TLS and HTTP/2 fingerprint curl_cffi reproduces
+_IMPERSONATE_BROWSER = 'chrome120'
+
+# Seconds a Cloudflare clearance is reused, kept inside cf_clearance's ~30 minute lifetime
+_CF_CACHE_TTL = 1500
+
+# Bytes copied per read when streaming a download to disk
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Browser-like headers sent by every session, alongside a User-Agent
+_BASE_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Cache-Control': 'max-age=0'
+}
+
+# Longest backoff, in seconds, between attempts against one rate-limited host
+_MAX_BACKOFF = 60
+
+# Kept-alive connections per host, sized for image download loops on one host
+_POOL_CONNECTIONS = 32
+_POOL_MAXSIZE = 64
+
+# Lowercase page text that marks a Cloudflare challenge, a blocked response
+# and an age gate
+_CF_INDICATORS = (
+    'checking your browser',
+    'cloudflare',
+    'just a moment',
+    'please wait',
+    'ray id',
+    'security check'
+)
+_PROTECTION_INDICATORS = (
+    'cloudflare',
+    'just a moment',
+    'checking your browser',
+    'security check',
+    'access denied',
+    'blocked'
+)
+_AGE_INDICATORS = (
+    'age verification',
+    'are you 18',
+    'enter your age',
+    'confirm your age',
+    'adult content',
+    'content warning'
+)
+
+# File extensions accepted as image or video media
+_MEDIA_EXTENSIONS = frozenset({
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp',
+    '.mp4', '.webm', '.avi', '.mov', '.mkv', '.flv'
+})
+
+# Resources a bypass browser never needs to fetch, blocked through DevTools
+_BLOCKED_URL_PATTERNS = ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.woff*', '*.ttf', '*.css', '*.mp4', '*.webm']
+
+# Hides the automation giveaways from pages; installed to run before any page script
+_STEALTH_JS = (
+    "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
+    "Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});"
+    "Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});"
+)
+
+# Age gate confirm controls, as one CSS selector list for a single DOM query
+_AGE_GATE_SELECTOR = (
+    "button[onclick*='18'], input[value='yes' i], .age-verify-yes, #age-yes, .enter-site"
+)
+
+# Buttons whose text confirms an age gate, which CSS selectors cannot match
+_AGE_GATE_TEXT_JS = (
+    "return Array.from(document.querySelectorAll('button'))"
+    ".filter(b => /Yes|Enter|Continue/.test(b.textContent));"
+)
+
+# Patched chromedrivers kept across runs, one per Chrome major version
+_CHROMEDRIVER_DIR = os.path.expanduser("~/.social_media_downloader/chromedriver")
+
+# Laplacian variance above which a text CAPTCHA is treated as noisy and median-filtered
+_CAPTCHA_NOISE_VARIANCE = 1000.0
+
+@functools.lru_cache(maxsize=4096)
+def _netloc(url: str) -> str:
+    """Get the network location of a URL, which keys sessions and caches per site."""
+    return urlparse(url).netloc
+
+@functools.lru_cache(maxsize=1)
+def _chrome_major_version() -> Optional[int]:
+    """Detect the installed Chrome's major version once per process, or None if unknown."""
+    try:
+        import undetected_chromedriver as uc
+        executable = uc.find_chrome_executable()
+        if not executable:
+            return None
+            
+        # Windows installs keep a version-named directory beside chrome.exe, and
+        # running chrome.exe --version there opens a browser instead of printing
+        install_dir = os.path.dirname(executable)
+        for name in os.listdir(install_dir):
+            match = re.fullmatch(r'(\d+)\.\d+\.\d+\.\d+', name)
+            if match:
+                return int(match.group(1))
+        if sys.platform == 'win32':
+            return None
+            
+        output = subprocess.run(
+            [executable, '--version'], capture_output=True, text=True, timeout=10
+        ).stdout
+        match = re.search(r'(\d+)\.\d+', output)
+        return int(match.group(1)) if match else None
+        
+    except Exception as e:
+        logging.debug(f"Could not detect Chrome version: {e}")
+        return None
+
+def _chromedriver_path(major_version: int) -> str:
+    """Get where the patched chromedriver for a Chrome major version is kept."""
+    suffix = '.exe' if sys.platform == 'win32' else ''
+    return os.path.join(_CHROMEDRIVER_DIR, f"chromedriver_{major_version}{suffix}")
+
+def _build_matcher(indicators: Iterable[str]) -> Callable[[str], bool]:
+    """Build a test for whether lowercased text contains any of the indicators.
+    
+    With pyahocorasick the whole page is scanned once for all indicators
+    instead of once per indicator.
+    """
+    indicators = tuple(indicators)
+    if AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for indicator in indicators:
+            automaton.add_word(indicator, indicator)
+        automaton.make_automaton()
+        return lambda text: next(automaton.iter(text), None) is not None
+    return lambda text: any(indicator in text for indicator in indicators)
+
+_has_cf_indicator = _build_matcher(_CF_INDICATORS)
+_has_protection_indicator = _build_matcher(_PROTECTION_INDICATORS)
+_has_age_indicator = _build_matcher(_AGE_INDICATORS)
+
+# Browser-side check for the Cloudflare indicators in the page title and the start
+# of its visible text, which returns a boolean instead of the serialized page
+_CF_PROBE_JS = (
+    "var text = document.title + ' ' + "
+    "(document.body ? document.body.innerText.slice(0, 2000) : '');"
+    f"return /{'|'.join(_CF_INDICATORS)}/i.test(text);"
+)
+
+def _on_cf_challenge(driver) -> bool:
+    """Check whether a driver's page is still a Cloudflare challenge."""
+    from selenium.common.exceptions import WebDriverException
+    try:
+        return bool(driver.execute_script(_CF_PROBE_JS))
+    except WebDriverException:
+        return _has_cf_indicator(driver.page_source.lower())
+
+def _iter_media_sources(content: str) -> Iterator[Tuple[Optional[str], bool]]:
+    """Yield (src, is_image) for the img, video and video source tags of a page.
+    
+    Uses selectolax's C parser when available and BeautifulSoup otherwise.
+    """
+    if SELECTOLAX_AVAILABLE:
+        tree = HTMLParser(content)
+        for node in tree.css('img'):
+            attrs = node.attributes
+            yield attrs.get('src') or attrs.get('data-src') or attrs.get('data-lazy-src'), True
+        for node in tree.css('video, video source'):
+            yield node.attributes.get('src'), False
+        return
+        
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, 'html.parser')
+    for img in soup.find_all('img'):
+        yield img.get('src') or img.get('data-src') or img.get('data-lazy-src'), True
+    for video in soup.find_all('video'):
+        yield video.get('src'), False
+        for source in video.find_all('source'):
+            yield source.get('src'), False
 
 class ProtectionBypass:
     """Advanced protection bypass system."""
     
     def __init__(self, config_manager=None):
         self.config_manager = config_manager
-        self.config = config_manager.get_config() if config_manager else {}
+        self.config = config_manager.config if config_manager else {}
         
         # User agents
-        self.ua = UserAgent()
+        self._ua = None
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
@@ -47,16 +262,46 @@ class ProtectionBypass:
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:109.0) Gecko/20100101 Firefox/119.0'
         ]
         
-        # Session cache
-        self.session_cache = {}
-        self.cloudflare_cache = {}
+        # Complete session headers for each user agent, built once
+        self._header_templates = [{'User-Agent': ua, **_BASE_HEADERS} for ua in self.user_agents]
+        
+        # Session cache: site key -> (session, creation time)
+        self.session_cache: Dict[str, Tuple[requests.Session, float]] = {}
+        
+        # Cloudflare clearances by host, persisted so they outlive the process
+        self.cloudflare_cache_file = os.path.expanduser("~/.social_media_downloader/cloudflare_cache.json")
+        self.cloudflare_cache = self._load_cloudflare_cache()
+        
+        # Idle (driver, idle since) pairs by (headless, use_wire); a driver is
+        # only ever in one pool or held by one caller
+        self._driver_pools: Dict[Tuple[bool, bool], queue.Queue] = {}
+        self._driver_pools_lock = threading.Lock()
+        _live_instances.add(self)
+        
+        # Per-host backoff: earliest time of the next attempt and failures in a row
+        self._rate_lock = threading.Lock()
+        self._next_attempt: Dict[str, float] = {}
+        self._rate_failures: Dict[str, int] = {}
+        
+    @property
+    def ua(self):
+        """fake_useragent generator, created on first use since it may fetch its data."""
+        if self._ua is None:
+            from fake_useragent import UserAgent
+            self._ua = UserAgent()
+        return self._ua
         
     def get_session(self, site_key: str = "default", use_cloudscraper: bool = True) -> requests.Session:
         """Get optimized session for site."""
-        if site_key in self.session_cache:
-            return self.session_cache[site_key]
+        cached = self.session_cache.get(site_key)
+        if cached:
+            session, created = cached
+            if time.time() - created < _SESSION_TTL:
+                return session
+            session.close()
             
         if use_cloudscraper:
+            import cloudscraper
             session = cloudscraper.create_scraper(
                 browser={
                     'browser': 'chrome',
@@ -68,19 +313,7 @@ class ProtectionBypass:
             session = requests.Session()
             
         # Configure session
-        session.headers.update({
-            'User-Agent': random.choice(self.user_agents),
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Cache-Control': 'max-age=0'
-        })
+        session.headers.update(random.choice(self._header_templates))
         
         # Retry strategy
         retry_strategy = Retry(
@@ -89,16 +322,22 @@ class ProtectionBypass:
             status_forcelist=[429, 500, 502, 503, 504],
         )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(
+            pool_connections=_POOL_CONNECTIONS,
+            pool_maxsize=_POOL_MAXSIZE,
+            max_retries=retry_strategy,
+            pool_block=False
+        )
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         
-        self.session_cache[site_key] = session
+        self.session_cache[site_key] = (session, time.time())
         return session
         
-    def create_undetected_driver(self, headless: bool = True, use_wire: bool = False) -> Union[uc.Chrome, wire_webdriver.Chrome]:
-        """Create undetected Chrome driver."""
+    def create_undetected_driver(self, headless: bool = True, use_wire: bool = False) -> Any:
+        """Create undetected Chrome driver (uc.Chrome, or seleniumwire's Chrome with use_wire)."""
         try:
+            import undetected_chromedriver as uc
             options = uc.ChromeOptions()
             
             if headless:
@@ -109,12 +348,11 @@ class ProtectionBypass:
             options.add_argument('--disable-blink-features=AutomationControlled')
             options.add_argument('--disable-extensions')
             options.add_argument('--disable-plugins')
-            options.add_argument('--disable-images')
-            options.add_argument('--disable-javascript')
+            options.add_argument('--blink-settings=imagesEnabled=false')
             options.add_argument('--disable-gpu')
             options.add_argument('--disable-web-security')
-            options.add_argument('--disable-features=VizDisplayCompositor')
-            options.add_argument('--window-size=1920,1080')
+            # Chrome only honours the last --disable-features, so list them all here
+            options.add_argument('--disable-features=VizDisplayCompositor,Translate,BackForwardCache,AcceptCHFrame')
             options.add_argument(f'--user-agent={random.choice(self.user_agents)}')
             
             # Random viewport
@@ -138,6 +376,7 @@ class ProtectionBypass:
             
             if use_wire:
                 # Use selenium-wire for request interception
+                from seleniumwire import webdriver as wire_webdriver
                 seleniumwire_options = {
                     'disable_encoding': True,
                     'suppress_connection_errors': False,
@@ -148,12 +387,23 @@ class ProtectionBypass:
                     seleniumwire_options=seleniumwire_options
                 )
             else:
-                driver = uc.Chrome(options=options, version_main=None)
-                
-            # Execute stealth scripts
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            driver.execute_script("Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]})")
-            driver.execute_script("Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']})")
+                # Reuse the detected version and the already patched chromedriver, so
+                # neither the version probe nor the download and patch run again
+                version_main = _chrome_major_version()
+                driver_path = _chromedriver_path(version_main) if version_main else None
+                if driver_path and os.path.isfile(driver_path):
+                    driver = uc.Chrome(options=options, version_main=version_main, driver_executable_path=driver_path)
+                else:
+                    driver = uc.Chrome(options=options, version_main=version_main)
+                    if driver_path:
+                        self._keep_chromedriver(driver, driver_path)
+                        
+            # Pages are only loaded for their cookies and HTML, so skip media, fonts and styles
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': _BLOCKED_URL_PATTERNS})
+            
+            # Install stealth scripts for every document, before the page's own scripts
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': _STEALTH_JS})
             
             return driver
             
@@ -161,86 +411,239 @@ class ProtectionBypass:
             logging.error(f"Failed to create undetected driver: {e}")
             raise
             
+    @staticmethod
+    def _keep_chromedriver(driver, driver_path: str) -> None:
+        """Copy the chromedriver a new driver patched to driver_path for later runs."""
+        try:
+            patched_path = driver.patcher.executable_path
+            os.makedirs(os.path.dirname(driver_path), exist_ok=True)
+            
+            # Copy beside the target and rename over it so no run sees a partial binary
+            tmp_path = driver_path + '.tmp'
+            shutil.copy2(patched_path, tmp_path)
+            os.replace(tmp_path, driver_path)
+            
+        except Exception as e:
+            logging.debug(f"Could not keep patched chromedriver: {e}")
+            
+    def _get_driver_pool(self, key: Tuple[bool, bool]) -> queue.Queue:
+        """Get the idle driver pool for a driver configuration."""
+        with self._driver_pools_lock:
+            pool = self._driver_pools.get(key)
+            if pool is None:
+                pool = self._driver_pools[key] = queue.Queue(maxsize=_DRIVER_POOL_SIZE)
+            return pool
+            
+    @contextmanager
+    def acquire_driver(self, headless: bool = True, use_wire: bool = False) -> Iterator[Any]:
+        """Borrow a driver for the duration of the block, reusing an idle one if possible.
+        
+        A driver whose block raised is quit rather than returned to the pool.
+        """
+        self.close_drivers(max_idle=_DRIVER_IDLE_TIMEOUT)
+        pool = self._get_driver_pool((headless, use_wire))
+        try:
+            driver, _ = pool.get_nowait()
+        except queue.Empty:
+            driver = self.create_undetected_driver(headless=headless, use_wire=use_wire)
+            
+        try:
+            yield driver
+        except BaseException:
+            self._quit_driver(driver)
+            raise
+            
+        try:
+            # Leave nothing from this caller's session for the next one
+            driver.delete_all_cookies()
+            driver.get('about:blank')
+            pool.put_nowait((driver, time.monotonic()))
+        except Exception:
+            self._quit_driver(driver)
+            
+    def close_drivers(self, max_idle: Optional[float] = None) -> None:
+        """Quit pooled idle drivers, or only those idle longer than max_idle seconds."""
+        with self._driver_pools_lock:
+            pools = list(self._driver_pools.values())
+        cutoff = None if max_idle is None else time.monotonic() - max_idle
+        for pool in pools:
+            kept = []
+            while True:
+                try:
+                    driver, idle_since = pool.get_nowait()
+                except queue.Empty:
+                    break
+                if cutoff is None or idle_since < cutoff:
+                    self._quit_driver(driver)
+                else:
+                    kept.append((driver, idle_since))
+            for entry in kept:
+                try:
+                    pool.put_nowait(entry)
+                except queue.Full:
+                    self._quit_driver(entry[0])
+            
+    @staticmethod
+    def _quit_driver(driver) -> None:
+        """Quit a driver, ignoring errors from one that already died."""
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.debug(f"Error quitting driver: {e}")
+            
     def bypass_cloudflare(self, url: str, timeout: int = 30) -> Optional[str]:
         """Bypass Cloudflare protection."""
-        cache_key = urlparse(url).netloc
+        cache_key = _netloc(url)
         
-        # Check cache first
-        if cache_key in self.cloudflare_cache:
-            cached_data = self.cloudflare_cache[cache_key]
-            if time.time() - cached_data['timestamp'] < 300:  # 5 minutes
-                return cached_data['cookies']
-                
-        driver = None
+        # Check cache first, including clearances saved by earlier runs
+        cached_data = self.cloudflare_cache.get(cache_key)
+        if cached_data:
+            if time.time() - cached_data['timestamp'] < _CF_CACHE_TTL:
+                content = self._fetch_with_clearance(url, cached_data)
+                if content is not None:
+                    return content
+            del self.cloudflare_cache[cache_key]
+            
         try:
+            from selenium.common.exceptions import TimeoutException
+            from selenium.webdriver.support.ui import WebDriverWait
+            
             logging.info(f"Attempting Cloudflare bypass for: {url}")
             
             # Try multiple approaches
             for attempt in range(3):
                 try:
-                    driver = self.create_undetected_driver(headless=True)
-                    driver.get(url)
-                    
-                    # Wait for Cloudflare challenge to complete
-                    start_time = time.time()
-                    while time.time() - start_time < timeout:
-                        page_source = driver.page_source.lower()
-                        
-                        # Check if still on Cloudflare page
-                        cf_indicators = [
-                            'checking your browser',
-                            'cloudflare',
-                            'just a moment',
-                            'please wait',
-                            'ray id',
-                            'security check'
-                        ]
+                    with self.acquire_driver(headless=True) as driver:
+                        driver.get(url)
                         
-                        if not any(indicator in page_source for indicator in cf_indicators):
-                            # Successfully bypassed
-                            cookies = {}
-                            for cookie in driver.get_cookies():
-                                cookies[cookie['name']] = cookie['value']
-                                
-                            # Cache the cookies
-                            self.cloudflare_cache[cache_key] = {
-                                'cookies': cookies,
-                                'timestamp': time.time()
-                            }
+                        # Wait for Cloudflare challenge to complete
+                        try:
+                            WebDriverWait(driver, timeout, poll_frequency=1).until_not(_on_cf_challenge)
+                        except TimeoutException:
+                            continue
                             
-                            content = driver.page_source
-                            driver.quit()
-                            return content
+                        # Successfully bypassed
+                        # One DevTools call for the cookies that apply to the page
+                        cookies = {}
+                        for cookie in driver.execute_cdp_cmd('Network.getCookies', {'urls': [url]})['cookies']:
+                            cookies[cookie['name']] = cookie['value']
                             
-                        time.sleep(2)
+                        # Cache the cookies
+                        self.cloudflare_cache[cache_key] = {
+                            'cookies': cookies,
+                            'user_agent': driver.execute_script("return navigator.userAgent"),
+                            'timestamp': time.time()
+                        }
+                        self._save_cloudflare_cache()
+                        
+                        return driver.page_source
                         
-                    driver.quit()
-                    
                 except Exception as e:
-                    if driver:
-                        driver.quit()
                     logging.warning(f"Cloudflare bypass attempt {attempt + 1} failed: {e}")
                     time.sleep(random.uniform(5, 10))
                     
             return None
             
         except Exception as e:
-            if driver:
-                driver.quit()
             logging.error(f"Cloudflare bypass failed: {e}")
             return None
             
+    def _fetch_with_clearance(self, url: str, clearance: Dict[str, Any]) -> Optional[str]:
+        """Fetch a page with cached Cloudflare cookies, or None if they no longer pass."""
+        try:
+            session = self.get_session(_netloc(url))
+            session.cookies.update(clearance['cookies'])
+            if clearance.get('user_agent'):
+                # cf_clearance is only honoured for the user agent that earned it
+                session.headers['User-Agent'] = clearance['user_agent']
+                
+            response = session.get(url, timeout=30)
+            if response.status_code == 200:
+                content = response.text
+                if not _has_protection_indicator(content.lower()):
+                    return content
+                    
+        except Exception as e:
+            logging.debug(f"Cached Cloudflare clearance failed for {url}: {e}")
+            
+        return None
+        
+    def _fetch_impersonated(self, url: str) -> Optional[str]:
+        """Fetch a page with Chrome's TLS fingerprint, or None if it is still protected.
+        
+        Cached Cloudflare cookies for the host are sent along. Requires curl_cffi.
+        """
+        if not CURL_CFFI_AVAILABLE:
+            return None
+            
+        try:
+            clearance = self.cloudflare_cache.get(_netloc(url))
+            response = cffi_requests.get(
+                url,
+                impersonate=_IMPERSONATE_BROWSER,
+                cookies=clearance['cookies'] if clearance else None,
+                timeout=30
+            )
+            if response.status_code == 200:
+                content = response.text
+                if not _has_protection_indicator(content.lower()):
+                    return content
+                    
+        except Exception as e:
+            logging.debug(f"Impersonated fetch failed for {url}: {e}")
+            
+        return None
+        
+    def _load_cloudflare_cache(self) -> Dict[str, Dict[str, Any]]:
+        """Load the unexpired Cloudflare clearances saved by earlier runs."""
+        try:
+            with open(self.cloudflare_cache_file, 'rb') as f:
+                entries = json_backend.loads(f.read())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"Could not load Cloudflare cache: {e}")
+            return {}
+            
+        now = time.time()
+        return {
+            key: entry for key, entry in entries.items()
+            if now - entry.get('timestamp', 0) < _CF_CACHE_TTL
+        }
+        
+    def _save_cloudflare_cache(self) -> None:
+        """Save the unexpired Cloudflare clearances for later runs."""
+        try:
+            now = time.time()
+            entries = {
+                key: entry for key, entry in self.cloudflare_cache.items()
+                if now - entry['timestamp'] < _CF_CACHE_TTL
+            }
+            
+            # Write beside the target and rename over it so a crash never leaves a partial file
+            os.makedirs(os.path.dirname(self.cloudflare_cache_file), exist_ok=True)
+            tmp_file = self.cloudflare_cache_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(json_backend.dumps(entries))
+            os.replace(tmp_file, self.cloudflare_cache_file)
+            
+        except Exception as e:
+            logging.warning(f"Could not save Cloudflare cache: {e}")
+            
     def solve_captcha(self, image_data: bytes, captcha_type: str = "text") -> Optional[str]:
         """Solve CAPTCHA using image processing."""
         try:
+            import cv2
+            import numpy as np
+            
             # Convert bytes to image
             nparr = np.frombuffer(image_data, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
             
             if captcha_type == "text":
-                return self._solve_text_captcha(img)
+                # Text CAPTCHAs are processed single-channel, so decode straight to gray
+                return self._solve_text_captcha(cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE))
             elif captcha_type == "image_selection":
-                return self._solve_image_selection_captcha(img)
+                return self._solve_image_selection_captcha(cv2.imdecode(nparr, cv2.IMREAD_COLOR))
             else:
                 logging.warning(f"Unsupported CAPTCHA type: {captcha_type}")
                 return None
@@ -249,17 +652,20 @@ class ProtectionBypass:
             logging.error(f"CAPTCHA solving failed: {e}")
             return None
             
-    def _solve_text_captcha(self, img: np.ndarray) -> Optional[str]:
-        """Solve text-based CAPTCHA."""
+    def _solve_text_captcha(self, img: Any) -> Optional[str]:
+        """Solve text-based CAPTCHA from a numpy image."""
         try:
-            # Preprocess image
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            import cv2
             
-            # Noise removal
-            denoised = cv2.medianBlur(gray, 5)
+            # Preprocess image
+            gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
             
+            # Noise removal, skipped for clean images
+            if cv2.Laplacian(gray, cv2.CV_64F).var() > _CAPTCHA_NOISE_VARIANCE:
+                gray = cv2.medianBlur(gray, 5)
+                
             # Thresholding
-            _, thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
             
             # Basic OCR (this is a simplified version)
             # In a real implementation, you'd use Tesseract or a CAPTCHA-solving service
@@ -272,8 +678,8 @@ class ProtectionBypass:
             logging.error(f"Text CAPTCHA solving failed: {e}")
             return None
             
-    def _solve_image_selection_captcha(self, img: np.ndarray) -> Optional[str]:
-        """Solve image selection CAPTCHA."""
+    def _solve_image_selection_captcha(self, img: Any) -> Optional[str]:
+        """Solve image selection CAPTCHA from a numpy image."""
         try:
             # This would require machine learning models
             # For now, return None to indicate manual intervention needed
@@ -285,53 +691,58 @@ class ProtectionBypass:
             return None
             
     def handle_rate_limiting(self, url: str, delay_base: int = 5) -> None:
-        """Handle rate limiting with exponential backoff."""
-        domain = urlparse(url).netloc
+        """Handle rate limiting with exponential backoff.
+        
+        Each call counts as a failure against the URL's host and doubles its
+        backoff, up to _MAX_BACKOFF. Callers waiting on the same host are spaced
+        out behind each other, while other hosts are unaffected.
+        """
+        domain = _netloc(url)
         
         # Implement per-domain rate limiting
-        delay = delay_base + random.uniform(1, 5)
+        with self._rate_lock:
+            failures = self._rate_failures.get(domain, 0)
+            self._rate_failures[domain] = failures + 1
+            
+            backoff = min(_MAX_BACKOFF, delay_base * 2 ** failures) + random.uniform(1, 5)
+            now = time.monotonic()
+            resume_at = max(now, self._next_attempt.get(domain, 0.0)) + backoff
+            self._next_attempt[domain] = resume_at
+            
+        delay = resume_at - now
         logging.info(f"Rate limiting for {domain}: waiting {delay:.2f} seconds")
         time.sleep(delay)
         
+    def _reset_backoff(self, url: str) -> None:
+        """Forget a host's failures after a successful attempt."""
+        domain = _netloc(url)
+        with self._rate_lock:
+            self._rate_failures.pop(domain, None)
+            self._next_attempt.pop(domain, None)
+            
     def bypass_age_verification(self, driver, url: str) -> bool:
         """Bypass age verification pages."""
         try:
+            from selenium.common.exceptions import WebDriverException
+            from selenium.webdriver.common.by import By
+            
             page_source = driver.page_source.lower()
             
             # Common age verification indicators
-            age_indicators = [
-                'age verification',
-                'are you 18',
-                'enter your age',
-                'confirm your age',
-                'adult content',
-                'content warning'
-            ]
-            
-            if any(indicator in page_source for indicator in age_indicators):
+            if _has_age_indicator(page_source):
                 logging.info("Age verification detected, attempting bypass...")
                 
-                # Try common bypass methods
-                bypass_selectors = [
-                    "button[onclick*='18']",
-                    "button:contains('Yes')",
-                    "button:contains('Enter')",
-                    "button:contains('Continue')",
-                    "input[value='yes' i]",
-                    ".age-verify-yes",
-                    "#age-yes",
-                    ".enter-site"
-                ]
+                # Try common bypass methods, gathering every candidate up front
+                candidates = driver.find_elements(By.CSS_SELECTOR, _AGE_GATE_SELECTOR)
+                candidates += driver.execute_script(_AGE_GATE_TEXT_JS) or []
                 
-                for selector in bypass_selectors:
+                for element in candidates:
                     try:
-                        element = WebDriverWait(driver, 5).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                        )
-                        element.click()
-                        time.sleep(2)
-                        return True
-                    except:
+                        if element.is_displayed() and element.is_enabled():
+                            element.click()
+                            time.sleep(2)
+                            return True
+                    except WebDriverException:
                         continue
                         
                 # Try setting age cookies
@@ -362,34 +773,34 @@ class ProtectionBypass:
                 logging.info(f"Attempt {attempt + 1} to access protected content: {url}")
                 
                 # Try simple session first
-                session = self.get_session(urlparse(url).netloc, use_cloudscraper=True)
+                session = self.get_session(_netloc(url), use_cloudscraper=True)
                 
                 try:
                     response = session.get(url, timeout=30)
                     
                     # Check if content is accessible
                     if response.status_code == 200:
-                        content_lower = response.text.lower()
+                        # response.text decodes (and may sniff the charset) on every access
+                        content = response.text
                         
                         # Check for protection indicators
-                        protection_indicators = [
-                            'cloudflare',
-                            'just a moment',
-                            'checking your browser',
-                            'security check',
-                            'access denied',
-                            'blocked'
-                        ]
-                        
-                        if not any(indicator in content_lower for indicator in protection_indicators):
-                            return response.text
+                        if not _has_protection_indicator(content.lower()):
+                            self._reset_backoff(url)
+                            return content
                             
                 except Exception:
                     pass
                     
+                # Many challenges only check the TLS fingerprint, which needs no browser
+                content = self._fetch_impersonated(url)
+                if content:
+                    self._reset_backoff(url)
+                    return content
+                    
                 # If simple session failed, try advanced bypass
                 content = self.bypass_cloudflare(url)
                 if content:
+                    self._reset_backoff(url)
                     return content
                     
                 # Rate limiting between attempts
@@ -403,69 +814,66 @@ class ProtectionBypass:
         return None
         
     def extract_media_urls(self, content: str, base_url: str) -> List[str]:
-        """Extract media URLs from page content."""
-        media_urls = []
+        """Extract media URLs from page content, without duplicates, in page order."""
+        # Insertion-ordered set of the URLs found so far
+        media_urls: Dict[str, None] = {}
         
         try:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # Extract image URLs
-            for img in soup.find_all('img'):
-                src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
-                if src:
-                    full_url = urljoin(base_url, src)
-                    if self._is_valid_media_url(full_url):
-                        media_urls.append(full_url)
-                        
-            # Extract video URLs
-            for video in soup.find_all('video'):
-                src = video.get('src')
-                if src:
-                    full_url = urljoin(base_url, src)
-                    media_urls.append(full_url)
+            for src, is_image in _iter_media_sources(content):
+                if not src:
+                    continue
+                    
+                # Absolute URLs need no joining, which would parse base_url again
+                full_url = src if src.startswith(('http://', 'https://')) else urljoin(base_url, src)
+                if full_url in media_urls:
+                    continue
+                    
+                # Video sources are taken as they are, images only with a media extension
+                if not is_image or self._is_valid_media_url(full_url):
+                    media_urls[full_url] = None
                     
-                # Check source tags
-                for source in video.find_all('source'):
-                    src = source.get('src')
-                    if src:
-                        full_url = urljoin(base_url, src)
-                        media_urls.append(full_url)
-                        
         except Exception as e:
             logging.error(f"Media URL extraction failed: {e}")
             
-        return list(set(media_urls))  # Remove duplicates
+        return list(media_urls)
         
     def _is_valid_media_url(self, url: str) -> bool:
         """Check if URL is a valid media URL."""
-        media_extensions = [
-            '.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp',
-            '.mp4', '.webm', '.avi', '.mov', '.mkv', '.flv'
-        ]
-        
-        url_lower = url.lower()
-        return any(ext in url_lower for ext in media_extensions)
+        # Only the extension of the path counts, not text elsewhere in the URL
+        return os.path.splitext(urlparse(url).path)[1].lower() in _MEDIA_EXTENSIONS
         
     def download_with_protection_bypass(self, url: str, output_path: str) -> bool:
         """Download file with protection bypass."""
         try:
-            session = self.get_session(urlparse(url).netloc)
+            domain = _netloc(url)
+            session = self.get_session(domain)
             
             # Add referer to avoid hotlink protection
             headers = {
-                'Referer': f"https://{urlparse(url).netloc}/",
+                'Referer': f"https://{domain}/",
                 'User-Agent': random.choice(self.user_agents)
             }
             
-            response = session.get(url, headers=headers, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            with session.get(url, headers=headers, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                
+                with open(output_path, 'wb') as f:
+                    # Reserve the space up front so the filesystem allocates it in one go
+                    content_length = int(response.headers.get('Content-Length') or 0)
+                    if content_length and hasattr(os, 'posix_fallocate'):
+                        try:
+                            os.posix_fallocate(f.fileno(), 0, content_length)
+                        except OSError:
+                            # Not supported by every filesystem; the download works without it
+                            pass
                         
+                    # Read the raw stream in large blocks, letting urllib3 undo any content encoding
+                    response.raw.decode_content = True
+                    shutil.copyfileobj(response.raw, f, _DOWNLOAD_CHUNK_SIZE)
+                    
+                    # Content-Length counts encoded bytes, so drop any unused reservation
+                    f.truncate()
+                    
             return True
             
         except Exception as e:
@@ -474,10 +882,29 @@ class ProtectionBypass:
             
     def clear_caches(self):
         """Clear all caches."""
+        for session, _ in self.session_cache.values():
+            session.close()
         self.session_cache.clear()
         self.cloudflare_cache.clear()
+        try:
+            os.remove(self.cloudflare_cache_file)
+        except FileNotFoundError:
+            pass
+            
+        self.close_drivers()
         logging.info("Protection bypass caches cleared")
 
+# Every live instance, so pooled drivers are quit at exit even if nothing
+# called clear_caches
+_live_instances = weakref.WeakSet()
+
+def _close_drivers_at_exit():
+    """Quit the idle drivers of every live instance."""
+    for bypass in list(_live_instances):
+        bypass.close_drivers()
+
+atexit.register(_close_drivers_at_exit)
+
 # Global instance
 protection_bypass = None
 
@@ -7,46 +7,86 @@ import os
 import logging
 import requests
 import json
+import time
 from typing import Dict, Any, Optional
 from packaging import version
 import subprocess
 import tempfile
 import shutil
 
+# Bytes copied per read when saving a downloaded installer
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
 class UpdateManager:
     """Manages application updates and version checking."""
     
     def __init__(self, config_manager):
         self.config_manager = config_manager
-        self.config = config_manager.get_config()
+        self.config = config_manager.config
         self.current_version = "1.0.0"
         self.update_url = "https://api.github.com/repos/yourusername/social-media-downloader/releases/latest"
         
+        # Reused across checks so later ones skip the TLS handshake to GitHub
+        self._session = requests.Session()
+        
+        # Epoch time before which GitHub's rate limit is known to be exhausted
+        self._rate_limit_reset = 0.0
+        
     def check_for_updates(self) -> Dict[str, Any]:
-        """Check for available updates."""
+        """Check for available updates.
+        
+        The request is conditional on the last release seen, so while it is
+        unchanged GitHub answers 304 without a body and the stored copy is used.
+        """
         try:
-            response = requests.get(self.update_url, timeout=10)
-            if response.status_code == 200:
-                release_info = response.json()
-                latest_version = release_info['tag_name'].lstrip('v')
+            # Don't spend a request until GitHub's rate limit window resets
+            if time.time() < self._rate_limit_reset:
+                return {'error': 'Update check rate limited'}
+                
+            cached = self.config_manager.get_setting('update_check') or {}
+            headers = {}
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
                 
-                if version.parse(latest_version) > version.parse(self.current_version):
-                    return {
-                        'update_available': True,
-                        'latest_version': latest_version,
-                        'current_version': self.current_version,
-                        'download_url': release_info['assets'][0]['browser_download_url'] if release_info['assets'] else None,
-                        'changelog': release_info['body']
-                    }
-                else:
-                    return {
-                        'update_available': False,
-                        'latest_version': latest_version,
-                        'current_version': self.current_version
-                    }
+            response = self._session.get(self.update_url, headers=headers, timeout=10)
+            if response.status_code == 304 and cached.get('release'):
+                release_info = cached['release']
+            elif response.status_code == 200:
+                data = response.json()
+                release_info = {
+                    'tag_name': data['tag_name'],
+                    'download_url': data['assets'][0]['browser_download_url'] if data['assets'] else None,
+                    'changelog': data['body']
+                }
+                self.config_manager.set_setting('update_check', {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'release': release_info
+                })
             else:
+                if response.headers.get('X-RateLimit-Remaining') == '0':
+                    self._rate_limit_reset = float(response.headers.get('X-RateLimit-Reset', 0))
                 return {'error': 'Failed to check for updates'}
                 
+            latest_version = release_info['tag_name'].lstrip('v')
+            
+            if version.parse(latest_version) > version.parse(self.current_version):
+                return {
+                    'update_available': True,
+                    'latest_version': latest_version,
+                    'current_version': self.current_version,
+                    'download_url': release_info['download_url'],
+                    'changelog': release_info['changelog']
+                }
+            else:
+                return {
+                    'update_available': False,
+                    'latest_version': latest_version,
+                    'current_version': self.current_version
+                }
+                
         except Exception as e:
             logging.error(f"Update check failed: {e}")
             return {'error': str(e)}
@@ -55,17 +95,19 @@ class UpdateManager:
         """Download and install update."""
         try:
             # Download update
-            response = requests.get(download_url, stream=True)
-            if response.status_code == 200:
+            with self._session.get(download_url, stream=True) as response:
+                if response.status_code != 200:
+                    return False
+                    
+                # Read the raw stream in large blocks, letting urllib3 undo any content encoding
+                response.raw.decode_content = True
                 with tempfile.NamedTemporaryFile(delete=False, suffix='.exe') as temp_file:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        temp_file.write(chunk)
+                    shutil.copyfileobj(response.raw, temp_file, _DOWNLOAD_CHUNK_SIZE)
                     temp_file_path = temp_file.name
-                
-                # Launch installer and exit current app
-                subprocess.Popen([temp_file_path])
-                return True
-            return False
+                    
+            # Launch installer and exit current app
+            subprocess.Popen([temp_file_path])
+            return True
             
         except Exception as e:
             logging.error(f"Update installation failed: {e}")